@@ -0,0 +1,158 @@
+"""
+Flash-sale checkout benchmark.
+
+Seeds customers whose carts all hold the same hot product, boots `main:app`
+under uvicorn once per mode and has every customer check out at the same
+moment from a pool of threads. `direct` is the per-request place_order path,
+`queued` turns on the group-commit admission queue (ORDER_ADMISSION_ENABLED).
+Prints a JSON report with throughput, p50/p95/p99 latency, status counts and
+an oversell check per mode.
+
+    python -m benchmarks.flash_sale --customers 2000 --stock 500 --concurrency 64
+
+Both modes start from a copy of the same seeded SQLite file.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from benchmarks.harness import Client, Server, configure, git_revision, seed, summarize
+
+MODES = {
+    "direct": {"ORDER_ADMISSION_ENABLED": "false"},
+    "queued": {"ORDER_ADMISSION_ENABLED": "true"},
+}
+
+
+def prepare(args) -> dict:
+    """Seed the template database: one hot product and a one-item cart per customer"""
+    database_path = os.path.join(args.workdir, "template.db")
+    if os.path.exists(database_path):
+        os.remove(database_path)
+    configure(database_path)
+    dataset = seed(products=1, customers=args.customers, orders_per_customer=0, product_stock=args.stock)
+
+    from sqlalchemy import insert, select
+    from core.database import SessionLocal
+    from models.cart import Cart, CartItem
+    from utils.security import create_access_token
+
+    hot_product = dataset["product_ids"][0]
+    with SessionLocal() as db:
+        cart_ids = db.scalars(select(Cart.id).order_by(Cart.user_id)).all()
+        db.execute(insert(CartItem), [
+            {"cart_id": cart_id, "product_id": hot_product, "quantity": args.quantity}
+            for cart_id in cart_ids
+        ])
+        db.commit()
+
+    # Minted directly, logging thousands of customers in would only measure bcrypt
+    tokens = [
+        create_access_token({"sub": email}, expires_delta=timedelta(hours=1))
+        for email in dataset["customers"]
+    ]
+    return {"database": database_path, "hot_product": hot_product, "tokens": tokens}
+
+
+def run_mode(mode: str, template: dict, args) -> dict:
+    database_path = os.path.join(args.workdir, f"{mode}.db")
+    shutil.copyfile(template["database"], database_path)
+    configure(database_path, ORDER_ADMISSION_PRODUCTS=template["hot_product"], **MODES[mode])
+
+    pending = list(template["tokens"])
+    lock = threading.Lock()
+    latencies = []
+    statuses = defaultdict(int)
+
+    with Server(port=args.port) as server:
+        start = threading.Barrier(args.concurrency)
+
+        def worker():
+            client = Client(server.port)
+            start.wait()
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    client.token = pending.pop()
+                status, _, elapsed = client.request("POST", "/api/orders/")
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] += 1
+
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    with sqlite3.connect(database_path) as connection:
+        remaining = connection.execute(
+            "SELECT stock FROM products WHERE id = ?", (template["hot_product"],)
+        ).fetchone()[0]
+        sold = connection.execute(
+            "SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE product_id = ?", (template["hot_product"],)
+        ).fetchone()[0]
+        orders = connection.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "checkouts": summarize(latencies, elapsed, sum(count for code, count in statuses.items() if code != 201)),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "orders": orders,
+        "units_sold": sold,
+        "stock_left": remaining,
+        # Every unit is accounted for and none was sold twice
+        "consistent": remaining >= 0 and sold + remaining == args.stock and orders == statuses[201],
+    }
+
+
+def run(args) -> dict:
+    args.workdir = args.workdir or tempfile.mkdtemp(prefix="flash-sale-")
+    os.makedirs(args.workdir, exist_ok=True)
+    template = prepare(args)
+    results = {mode: run_mode(mode, template, args) for mode in args.modes}
+
+    return {
+        "benchmark": "flash_sale",
+        "revision": git_revision(),
+        "config": {
+            "customers": args.customers,
+            "stock": args.stock,
+            "quantity": args.quantity,
+            "concurrency": args.concurrency,
+        },
+        "modes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=1000, help="customers checking out, one order each")
+    parser.add_argument("--stock", type=int, default=250, help="units of the hot product on sale")
+    parser.add_argument("--quantity", type=int, default=1, help="units in every cart")
+    parser.add_argument("--concurrency", type=int, default=32, help="simultaneous checkout requests")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--workdir", help="directory for the seeded SQLite files (default: a temp dir)")
+    parser.add_argument("--port", type=int, help="port for uvicorn (default: any free port)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Shared pieces of the local benchmarks: a seeded SQLite database, a uvicorn
+server in a subprocess, and latency statistics.
+
+Project modules read their settings at import time, so `configure()` must run
+before anything from the app is imported.
+"""
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = "benchpass"
+
+
+def configure(database_path: Optional[str] = None, **overrides) -> str:
+    """Point the app at a fresh SQLite file and return its URL"""
+    if database_path is None:
+        handle, database_path = tempfile.mkstemp(prefix="bench-", suffix=".db")
+        os.close(handle)
+        os.remove(database_path)
+
+    database_url = f"sqlite:///{database_path}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-that-is-long-enough")
+    for key, value in overrides.items():
+        os.environ[key] = str(value)
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    return database_url
+
+
+def seed(products: int, customers: int, orders_per_customer: int, product_stock: int = 10 ** 9) -> Dict:
+    """
+    Create the schema and fill it with a deterministic dataset.
+
+    Every customer shares one password hash so seeding does not spend minutes
+    in bcrypt. Returns the ids and credentials the traffic generator needs.
+    """
+    from sqlalchemy import insert
+
+    from main import init_db
+    from core.database import SessionLocal
+    from models.cart import Cart
+    from models.order import Order, OrderItem, OrderStatus
+    from models.product import Product
+    from models.user import User, UserRole
+    from utils.security import get_password_hash
+
+    init_db()
+    rng = random.Random(42)
+    hashed_password = get_password_hash(PASSWORD)
+
+    with SessionLocal() as db:
+        db.execute(insert(Product), [
+            {
+                "name": f"Product {index:06d}",
+                "description": f"Seeded product {index} in category {index % 50}",
+                "price": round(rng.uniform(1, 500), 2),
+                "stock": product_stock,
+            }
+            for index in range(products)
+        ])
+        db.execute(insert(User), [
+            {
+                "email": f"customer{index}@bench.example.com",
+                "username": f"customer{index}",
+                "hashed_password": hashed_password,
+                "role": UserRole.CUSTOMER,
+            }
+            for index in range(customers)
+        ] + [{
+            "email": "admin@bench.example.com",
+            "username": "benchadmin",
+            "hashed_password": hashed_password,
+            "role": UserRole.ADMIN,
+        }])
+        db.flush()
+
+        product_rows = db.query(Product.id, Product.price).all()
+        user_ids = [user_id for (user_id,) in db.query(User.id).filter(User.role == UserRole.CUSTOMER)]
+        db.execute(insert(Cart), [{"user_id": user_id} for user_id in user_ids])
+
+        # Order history, so listing a customer's orders has rows to page through
+        for user_id in user_ids:
+            for _ in range(orders_per_customer):
+                lines = rng.sample(product_rows, k=min(3, len(product_rows)))
+                db.add(Order(
+                    user_id=user_id,
+                    status=rng.choice(list(OrderStatus)),
+                    total_amount=sum(price for _, price in lines),
+                    items=[OrderItem(product_id=product_id, quantity=1, price=price) for product_id, price in lines],
+                ))
+        db.commit()
+
+    return {
+        "product_ids": [product_id for product_id, _ in product_rows],
+        "customers": [f"customer{index}@bench.example.com" for index in range(customers)],
+        "admin": "admin@bench.example.com",
+        "password": PASSWORD,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """`uvicorn main:app` in a subprocess, sharing this process' environment"""
+
+    def __init__(self, port: Optional[int] = None, app: str = "main:app", extra_args: Optional[List[str]] = None):
+        self.port = port or free_port()
+        self.app = app
+        self.extra_args = extra_args or []
+        self.process = None
+
+    def __enter__(self) -> "Server":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app, "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning", *self.extra_args],
+            cwd=REPO_ROOT,
+            env=os.environ.copy(),
+        )
+        self.wait_ready()
+        return self
+
+    def wait_ready(self, timeout: float = 30.0) -> float:
+        """Poll until the app answers; returns the seconds it took"""
+        started = time.perf_counter()
+        while time.perf_counter() - started < timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with code {self.process.returncode}")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=1)
+                connection.request("GET", "/")
+                if connection.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("server did not start in time")
+
+    def __exit__(self, *exc_info) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class Client:
+    """Keep-alive JSON client over http.client; one per worker thread"""
+
+    def __init__(self, port: int):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.token = None
+
+    def request(self, method: str, path: str, body=None):
+        """Send a request and return (status, parsed body, seconds)"""
+        headers = {}
+        payload = None
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            payload = json.dumps(body)
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request instead of failing the run
+            self.connection.close()
+            return 0, None, time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+
+        parsed = None
+        if data and response.getheader("content-type", "").startswith("application/json"):
+            parsed = json.loads(data)
+        return response.status, parsed, elapsed
+
+    def login(self, email: str, password: str):
+        status, body, elapsed = self.request("POST", "/api/auth/login/json", {"email": email, "password": password})
+        if status == 200:
+            self.token = body["access_token"]
+        return status, body, elapsed
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], duration: float, errors: int = 0) -> Dict:
+    """Throughput and latency percentiles in milliseconds"""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / duration, 2) if duration else 0.0,
+        "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 0.50), 3),
+        "p95_ms": round(1000 * percentile(values, 0.95), 3),
+        "p99_ms": round(1000 * percentile(values, 0.99), 3),
+        "max_ms": round(1000 * values[-1], 3) if values else 0.0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    """The commit being measured, so reports from different runs can be lined up"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,209 @@
+"""
+End-to-end HTTP load benchmark.
+
+Seeds a fresh SQLite database, boots `main:app` under uvicorn and drives a
+mixed customer workload from a pool of threads for a fixed duration. Prints a
+JSON report with throughput and p50/p95/p99 latency per route.
+
+    python -m benchmarks.http_load --duration 30 --concurrency 16 --output bench.json
+
+Runs offline; only the standard library and the app's own requirements are used.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks.harness import Client, Server, configure, git_revision, seed, summarize
+
+# Relative weight of each customer action in the traffic mix
+WORKLOAD = {
+    "browse": 35,
+    "view_product": 20,
+    "search": 5,
+    "cart_add": 15,
+    "cart_update": 5,
+    "cart_remove": 3,
+    "view_cart": 5,
+    "checkout": 4,
+    "order_history": 6,
+    "login": 2,
+}
+
+
+class Recorder:
+    """Collects latencies per route label from every worker thread"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, route: str, status: int, elapsed: float) -> None:
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            self.statuses[route][status] += 1
+            if status == 0 or status >= 400:
+                self.errors[route] += 1
+
+
+class VirtualCustomer:
+    """One logged-in customer walking through the workload on its own connection"""
+
+    def __init__(self, port: int, email: str, password: str, product_ids, recorder: Recorder, seed_value: int):
+        self.client = Client(port)
+        self.email = email
+        self.password = password
+        self.product_ids = product_ids
+        self.recorder = recorder
+        self.rng = random.Random(seed_value)
+        self.cart = set()
+
+    def call(self, route: str, method: str, path: str, body=None):
+        status, data, elapsed = self.client.request(method, path, body)
+        self.recorder.record(route, status, elapsed)
+        return status, data
+
+    def run(self, deadline: float) -> None:
+        self.login()
+        actions = list(WORKLOAD)
+        weights = list(WORKLOAD.values())
+        while time.perf_counter() < deadline:
+            action = self.rng.choices(actions, weights)[0]
+            getattr(self, action)()
+
+    def login(self):
+        status, _, elapsed = self.client.login(self.email, self.password)
+        self.recorder.record("POST /api/auth/login/json", status, elapsed)
+
+    def browse(self):
+        skip = self.rng.randrange(0, max(1, len(self.product_ids) - 20))
+        self.call("GET /api/products/", "GET", f"/api/products/?skip={skip}&limit=20")
+
+    def view_product(self):
+        product_id = self.rng.choice(self.product_ids)
+        self.call("GET /api/products/{id}", "GET", f"/api/products/{product_id}")
+
+    def search(self):
+        self.call("GET /api/products/search", "GET", f"/api/products/search?q=category+{self.rng.randrange(50)}")
+
+    def cart_add(self):
+        product_id = self.rng.choice(self.product_ids)
+        status, _ = self.call("POST /api/cart/items", "POST", "/api/cart/items",
+                              {"product_id": product_id, "quantity": 1})
+        if status == 201:
+            self.cart.add(product_id)
+
+    def cart_update(self):
+        if not self.cart:
+            return self.cart_add()
+        product_id = self.rng.choice(sorted(self.cart))
+        self.call("PUT /api/cart/items/{id}", "PUT", f"/api/cart/items/{product_id}",
+                  {"quantity": self.rng.randint(1, 3)})
+
+    def cart_remove(self):
+        if not self.cart:
+            return self.cart_add()
+        product_id = self.rng.choice(sorted(self.cart))
+        self.cart.discard(product_id)
+        self.call("DELETE /api/cart/items/{id}", "DELETE", f"/api/cart/items/{product_id}")
+
+    def view_cart(self):
+        self.call("GET /api/cart/", "GET", "/api/cart/")
+
+    def checkout(self):
+        if not self.cart:
+            self.cart_add()
+        status, _ = self.call("POST /api/orders/", "POST", "/api/orders/")
+        if status == 201:
+            self.cart.clear()
+
+    def order_history(self):
+        self.call("GET /api/orders/", "GET", "/api/orders/?limit=20")
+
+
+def run(args) -> dict:
+    configure(args.database, BCRYPT_ROUNDS=args.bcrypt_rounds)
+    dataset = seed(args.products, args.customers, args.orders_per_customer)
+
+    recorder = Recorder()
+    with Server(port=args.port) as server:
+        customers = [
+            VirtualCustomer(server.port, dataset["customers"][index % len(dataset["customers"])],
+                            dataset["password"], dataset["product_ids"], recorder, seed_value=index)
+            for index in range(args.concurrency)
+        ]
+
+        if args.warmup:
+            warmup_deadline = time.perf_counter() + args.warmup
+            _run_threads(customers, warmup_deadline)
+            recorder.reset()
+
+        started = time.perf_counter()
+        _run_threads(customers, started + args.duration)
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in recorder.latencies.values())
+    return {
+        "benchmark": "http_load",
+        "revision": git_revision(),
+        "config": {
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "concurrency": args.concurrency,
+            "products": args.products,
+            "customers": args.customers,
+            "orders_per_customer": args.orders_per_customer,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(
+            [value for values in recorder.latencies.values() for value in values],
+            elapsed, sum(recorder.errors.values())
+        ),
+        "requests": total,
+        "routes": {
+            route: dict(summarize(values, elapsed, recorder.errors[route]),
+                        statuses={str(code): count for code, count in sorted(recorder.statuses[route].items())})
+            for route, values in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def _run_threads(customers, deadline: float) -> None:
+    threads = [threading.Thread(target=customer.run, args=(deadline,)) for customer in customers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds of traffic")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=8, help="simultaneous virtual customers")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--orders-per-customer", type=int, default=10)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="cost used by the server for logins")
+    parser.add_argument("--database", help="SQLite file to create (default: a temp file)")
+    parser.add_argument("--port", type=int, help="port for uvicorn (default: any free port)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
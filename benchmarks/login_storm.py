@@ -0,0 +1,126 @@
+"""
+Catalog latency during a login storm.
+
+Seeds a catalog and customers, boots `main:app` under uvicorn with the real
+bcrypt cost, and measures catalog reads (product list and detail pages) in
+two phases of equal length: readers alone, then the same readers while a
+crowd of clients logs in as fast as it can. With bcrypt on its own bounded
+pool, catalog p99 should barely move between the phases. Prints a JSON
+report per phase.
+
+    python -m benchmarks.login_storm --duration 15 --readers 8 --logins 32
+
+Runs offline; only the standard library and the app's own requirements are used.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from benchmarks.harness import Client, Server, configure, git_revision, seed, summarize
+
+
+def _reader(port: int, product_ids, deadline: float, latencies: list, errors: list, seed_value: int) -> None:
+    client = Client(port)
+    rng = random.Random(seed_value)
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.5:
+            path = f"/api/products/?skip={rng.randrange(0, max(1, len(product_ids) - 20))}&limit=20"
+        else:
+            path = f"/api/products/{rng.choice(product_ids)}"
+        status, _, elapsed = client.request("GET", path)
+        latencies.append(elapsed)
+        if status != 200:
+            errors.append(status)
+
+
+def _login(port: int, emails, password: str, deadline: float, latencies: list, errors: list, seed_value: int) -> None:
+    client = Client(port)
+    rng = random.Random(seed_value)
+    while time.perf_counter() < deadline:
+        status, _, elapsed = client.login(rng.choice(emails), password)
+        latencies.append(elapsed)
+        if status != 200:
+            errors.append(status)
+
+
+def _phase(port: int, dataset: dict, args, storm: bool) -> dict:
+    deadline = time.perf_counter() + args.duration
+    reads, read_errors, logins, login_errors = [], [], [], []
+
+    threads = [
+        threading.Thread(target=_reader, args=(port, dataset["product_ids"], deadline, reads, read_errors, index))
+        for index in range(args.readers)
+    ]
+    if storm:
+        threads += [
+            threading.Thread(target=_login, args=(port, dataset["customers"], dataset["password"], deadline,
+                                                  logins, login_errors, index))
+            for index in range(args.logins)
+        ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {"catalog": summarize(reads, elapsed, len(read_errors))}
+    if storm:
+        report["logins"] = summarize(logins, elapsed, len(login_errors))
+    return report
+
+
+def run(args) -> dict:
+    configure(args.database, BCRYPT_ROUNDS=args.bcrypt_rounds)
+    dataset = seed(args.products, args.customers, orders_per_customer=0)
+
+    with Server(port=args.port) as server:
+        # Warm the catalog cache and the connection pools before measuring
+        _phase(server.port, dataset, argparse.Namespace(**{**vars(args), "duration": args.warmup}), storm=False)
+        baseline = _phase(server.port, dataset, args, storm=False)
+        storm = _phase(server.port, dataset, args, storm=True)
+
+    return {
+        "benchmark": "login_storm",
+        "revision": git_revision(),
+        "config": {
+            "duration_s": args.duration,
+            "readers": args.readers,
+            "logins": args.logins,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "products": args.products,
+            "customers": args.customers,
+        },
+        "baseline": baseline,
+        "storm": storm,
+        "catalog_p99_ratio": round(storm["catalog"]["p99_ms"] / baseline["catalog"]["p99_ms"], 2)
+        if baseline["catalog"]["p99_ms"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per measured phase")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before the baseline")
+    parser.add_argument("--readers", type=int, default=8, help="threads reading the catalog")
+    parser.add_argument("--logins", type=int, default=32, help="threads logging in during the storm")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="cost used by the server for logins")
+    parser.add_argument("--database", help="SQLite file to create (default: a temp file)")
+    parser.add_argument("--port", type=int, help="port for uvicorn (default: any free port)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Offset vs keyset pagination benchmark.
+
+Seeds a large catalog (1M products by default), boots `main:app` under
+uvicorn with the catalog cache disabled, and fetches one page at increasing
+depths both ways: `?skip=N` (OFFSET, reads and throws away N rows) and a
+`?cursor=` pointing at row N (seeks through ix_products_created_at_id).
+Prints p50/p99 latency per depth as JSON.
+
+    python -m benchmarks.pagination --products 1000000 --repeat 20
+
+Seeding a million rows takes a minute or two; pass --database to reuse a file.
+"""
+import argparse
+import json
+import os
+
+from benchmarks.harness import Client, Server, configure, git_revision, seed, summarize
+
+DEPTH_FRACTIONS = (0.0, 0.001, 0.01, 0.1, 0.5, 0.99)
+
+
+def cursor_at(depth: int) -> str:
+    """The cursor a client would hold after paging through `depth` products"""
+    from sqlalchemy import select
+    from core.database import SessionLocal
+    from models.product import Product
+    from utils.pagination import encode_cursor
+
+    with SessionLocal() as db:
+        created_at, product_id = db.execute(
+            select(Product.created_at, Product.id)
+            .order_by(Product.created_at, Product.id)
+            .offset(depth - 1).limit(1)
+        ).one()
+    return encode_cursor("created_at", created_at, product_id)
+
+
+def run(args) -> dict:
+    reuse = args.database and os.path.exists(args.database)
+    # A disabled cache makes every request reach the database
+    configure(args.database, CATALOG_CACHE_SIZE=0)
+    if reuse:
+        from main import init_db
+        init_db()
+    else:
+        seed(args.products, customers=1, orders_per_customer=0)
+
+    from sqlalchemy import func, select
+    from core.database import SessionLocal
+    from models.product import Product
+
+    with SessionLocal() as db:
+        total = db.scalar(select(func.count()).select_from(Product))
+
+    depths = sorted({int(total * fraction) for fraction in DEPTH_FRACTIONS})
+    paths = {}
+    for depth in depths:
+        paths[depth] = {
+            "offset": f"/api/products/?skip={depth}&limit={args.page_size}",
+            "keyset": (f"/api/products/?cursor={cursor_at(depth)}&limit={args.page_size}" if depth
+                       else f"/api/products/?sort=created_at&limit={args.page_size}"),
+        }
+
+    results = {}
+    with Server(port=args.port) as server:
+        client = Client(server.port)
+        for depth, modes in paths.items():
+            results[str(depth)] = {}
+            for mode, path in modes.items():
+                latencies = []
+                for _ in range(args.repeat):
+                    status, body, elapsed = client.request("GET", path)
+                    if status != 200 or len(body) != min(args.page_size, total - depth):
+                        raise RuntimeError(f"{mode} page at {depth} failed with {status}")
+                    latencies.append(elapsed)
+                stats = summarize(latencies, sum(latencies))
+                results[str(depth)][mode] = {key: stats[key] for key in ("p50_ms", "p99_ms", "mean_ms")}
+
+    return {
+        "benchmark": "pagination",
+        "revision": git_revision(),
+        "config": {"products": total, "page_size": args.page_size, "repeat": args.repeat},
+        "depths": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20, help="requests per depth and mode")
+    parser.add_argument("--database", help="SQLite file to create, or reuse when it exists")
+    parser.add_argument("--port", type=int, help="port for uvicorn (default: any free port)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Product search benchmark: SQLite FTS5 vs the LIKE scan it replaced.
+
+Seeds a large catalog (1M products by default) and times the ranked FTS5
+query behind `/api/products/search` against the `ILIKE '%q%'` fallback on
+the same database, for queries from very selective to matching everything.
+The FTS path is also timed end to end over HTTP with the catalog cache off.
+Prints p50/p99 latency per query as JSON.
+
+    python -m benchmarks.search --products 1000000 --repeat 10
+
+Seeding a million rows takes a minute or two; pass --database to reuse a file.
+"""
+import argparse
+import json
+import os
+import time
+from urllib.parse import quote
+
+from benchmarks.harness import Client, Server, configure, git_revision, seed, summarize
+
+
+def queries(total: int) -> dict:
+    """Named queries over the seeded text ("Product 000042", "... in category 7")"""
+    return {
+        "one_match": f"Product {total // 2:06d}",
+        "two_percent": "category 7",
+        "prefix_all": "seed",
+        "no_match": "nonexistent",
+    }
+
+
+def _time(statement_factory, repeat: int) -> dict:
+    from core.database import SessionLocal
+
+    latencies = []
+    with SessionLocal() as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = db.execute(statement_factory()).scalars().all()
+            latencies.append(time.perf_counter() - started)
+    stats = summarize(latencies, sum(latencies))
+    return {"rows": len(rows), **{key: stats[key] for key in ("p50_ms", "p99_ms", "mean_ms")}}
+
+
+def run(args) -> dict:
+    reuse = args.database and os.path.exists(args.database)
+    configure(args.database, CATALOG_CACHE_SIZE=0)
+    if reuse:
+        from main import init_db
+        init_db()
+    else:
+        seed(args.products, customers=1, orders_per_customer=0)
+
+    from sqlalchemy import func, select
+    from core.database import SessionLocal
+    from core.search import search_statement
+    from models.product import Product
+
+    with SessionLocal() as db:
+        total = db.scalar(select(func.count()).select_from(Product))
+
+    results = {}
+    for name, q in queries(total).items():
+        results[name] = {
+            "q": q,
+            "fts5": _time(lambda: search_statement("sqlite", q, 0, args.limit), args.repeat),
+            # Any dialect other than sqlite/postgresql gets the LIKE scan
+            "like": _time(lambda: search_statement("generic", q, 0, args.limit), args.repeat),
+        }
+
+    with Server(port=args.port) as server:
+        client = Client(server.port)
+        for name, report in results.items():
+            latencies = []
+            for _ in range(args.repeat):
+                status, _, elapsed = client.request("GET", f"/api/products/search?q={quote(report['q'])}&limit={args.limit}")
+                if status != 200:
+                    raise RuntimeError(f"search for {report['q']!r} failed with {status}")
+                latencies.append(elapsed)
+            stats = summarize(latencies, sum(latencies))
+            report["http_fts5"] = {key: stats[key] for key in ("p50_ms", "p99_ms", "mean_ms")}
+
+    return {
+        "benchmark": "search",
+        "revision": git_revision(),
+        "config": {"products": total, "limit": args.limit, "repeat": args.repeat},
+        "queries": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20, help="results per search page")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per query and engine")
+    parser.add_argument("--database", help="SQLite file to create, or reuse when it exists")
+    parser.add_argument("--port", type=int, help="port for uvicorn (default: any free port)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
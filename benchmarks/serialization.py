@@ -0,0 +1,109 @@
+"""
+Serialization microbenchmark for product lists.
+
+Compares, for 100 / 1k / 10k products:
+  fastapi_default  validate through ProductResponse, dump to Python, json.dumps
+                   (what a plain `response_model` route does)
+  pydantic_json    validate through ProductResponse and dump_json
+  fast_path        utils.serialization.dump_products
+
+    python -m benchmarks.serialization --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.harness import configure, git_revision
+
+SIZES = (100, 1000, 10000)
+
+
+def make_products(count: int):
+    """Transient ORM objects, a third of them with an image"""
+    from models.product import Product
+
+    now = datetime(2026, 1, 1)
+    return [
+        Product(
+            id=index + 1,
+            name=f"Product {index:06d}",
+            description="Seeded product description " * 8,
+            price=round(1 + index * 0.37, 2),
+            stock=index % 100,
+            image=f"{index:032x}.png" if index % 3 == 0 else None,
+            created_at=now + timedelta(seconds=index),
+            updated_at=now + timedelta(seconds=index, microseconds=123),
+        )
+        for index in range(count)
+    ]
+
+
+def measure(function, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+def run(repeat: int) -> dict:
+    configure()
+    from typing import List
+    from pydantic import TypeAdapter
+    from schemas.product import ProductResponse
+    from utils import serialization
+
+    adapter = TypeAdapter(List[ProductResponse])
+
+    def fastapi_default(products):
+        content = adapter.dump_python(adapter.validate_python(products, from_attributes=True), mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    def pydantic_json(products):
+        return adapter.dump_json(adapter.validate_python(products, from_attributes=True))
+
+    results = {}
+    for size in SIZES:
+        products = make_products(size)
+        # Every path must produce the same document
+        assert json.loads(serialization.dump_products(products)) == json.loads(pydantic_json(products))
+
+        results[str(size)] = {
+            "fastapi_default": measure(lambda: fastapi_default(products), repeat),
+            "pydantic_json": measure(lambda: pydantic_json(products), repeat),
+            "fast_path": measure(lambda: serialization.dump_products(products), repeat),
+        }
+        baseline = results[str(size)]["fastapi_default"]["median_ms"]
+        fast = results[str(size)]["fast_path"]["median_ms"]
+        results[str(size)]["speedup_vs_fastapi_default"] = round(baseline / fast, 2) if fast else None
+
+    return {
+        "benchmark": "serialization",
+        "revision": git_revision(),
+        "encoder": "orjson" if serialization.orjson is not None else "pydantic_core",
+        "repeat": repeat,
+        "products": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per size and path")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.repeat), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Cold start benchmark.
+
+Measures, over several fresh processes, how long `import main` takes and how
+long a uvicorn worker needs from spawn to its first 200 response. Three
+scenarios are timed: an empty database (tables created at startup), a
+database that already has the schema, and DB_CREATE_ALL=false as used when
+migrations own the schema.
+
+    python -m benchmarks.startup --runs 10 --output startup.json
+
+Prints a JSON report; keep it next to the git revision it was measured on.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import REPO_ROOT, Server, configure, git_revision
+
+SCENARIOS = {
+    "empty_database": {"DB_CREATE_ALL": "true"},
+    "existing_schema": {"DB_CREATE_ALL": "true"},
+    "create_all_disabled": {"DB_CREATE_ALL": "false"},
+}
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def _stats(values) -> dict:
+    return {
+        "median_ms": round(1000 * statistics.median(values), 1),
+        "min_ms": round(1000 * min(values), 1),
+        "max_ms": round(1000 * max(values), 1),
+    }
+
+
+def measure(scenario: str, runs: int, workdir: str) -> dict:
+    import_times = []
+    ready_times = []
+
+    for run in range(runs):
+        database_path = os.path.join(workdir, f"{scenario}-{run}.db")
+        configure(database_path, **SCENARIOS[scenario])
+        if scenario != "empty_database":
+            # A worker joining a deployment whose schema already exists
+            subprocess.run([sys.executable, "-c", "from main import init_db; init_db()"],
+                           cwd=REPO_ROOT, env=os.environ.copy(), check=True)
+
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SNIPPET], cwd=REPO_ROOT, env=os.environ.copy()
+        )
+        import_times.append(float(output.decode().strip().splitlines()[-1]))
+
+        # Spawn to first 200, the time an autoscaled worker is not serving
+        started = time.perf_counter()
+        with Server():
+            ready_times.append(time.perf_counter() - started)
+
+    return {"import": _stats(import_times), "first_response": _stats(ready_times)}
+
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="startup-bench-")
+    return {
+        "benchmark": "startup",
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "config": {"runs": args.runs},
+        "scenarios": {scenario: measure(scenario, args.runs, workdir) for scenario in args.scenarios},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.metrics import orders_placed, stock_rejections
+from models.cart import CartItem
+from models.order import Order, OrderItem, OrderStatus
+from models.product import Product
+from utils.inventory import reserve_stock
+from utils.rollups import record_orders
+
+logger = logging.getLogger(__name__)
+
+# Attempts at a batch whose stock changed between the read and the UPDATE
+MAX_BATCH_ATTEMPTS = 3
+# How long shutdown waits for queued checkouts before failing them
+DRAIN_TIMEOUT_SECONDS = 10.0
+DRAIN_POLL_SECONDS = 0.01
+
+
+@dataclass
+class Checkout:
+    """One queued place_order call: the cart lines it snapshotted and its pending result"""
+    user_id: int
+    # (cart item id, product id, quantity, unit price)
+    lines: List[Tuple[int, int, int, float]]
+    future: asyncio.Future = field(repr=False)
+
+
+class OrderAdmissionQueue:
+    """
+    Group commit for checkouts of hot products.
+
+    place_order hands the cart snapshot to `submit` and waits. A single writer
+    task takes up to `batch_size` checkouts at a time (waiting at most
+    `max_wait` seconds for a batch to fill), allocates stock to them in
+    arrival order, and applies every accepted order's stock decrement, order
+    rows and cart cleanup in one transaction. Each caller then gets its order
+    id, or the same 404/400 it would have got from the per-request path.
+    """
+
+    def __init__(self, enabled: bool, hot_products: Iterable[int], batch_size: int,
+                 max_wait: float, maxsize: int):
+        self.enabled = enabled
+        self.hot_products: Set[int] = set(hot_products)
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._loop = None
+        # Checkouts the writer has taken off the queue and not answered yet
+        self._batch: List[Checkout] = []
+        self._closing = False
+
+    def handles(self, product_ids: Iterable[int]) -> bool:
+        """Whether a checkout with these products goes through the queue"""
+        if not self.enabled:
+            return False
+        # No explicit list means every checkout is queued
+        return not self.hot_products or any(product_id in self.hot_products for product_id in product_ids)
+
+    def _ensure_writer(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (e.g. a restarted test client)
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._writer = None
+            self._closing = False
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, user_id: int, lines: List[Tuple[int, int, int, float]]) -> int:
+        """Queue a checkout and wait for its order id"""
+        queue = self._ensure_writer()
+        checkout = Checkout(user_id, lines, asyncio.get_running_loop().create_future())
+        try:
+            if self._closing:
+                raise asyncio.QueueFull
+            queue.put_nowait(checkout)
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many orders in progress, please retry",
+                headers={"Retry-After": "1"},
+            )
+        return await checkout.future
+
+    async def stop(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> None:
+        """
+        Stop taking checkouts, let the writer finish the queued ones (for at
+        most `timeout` seconds), then cancel it. Checkouts still queued after
+        that get a 503. Call from the shutdown hook, on the writer's loop.
+        """
+        writer, queue = self._writer, self._queue
+        if writer is None or writer.done():
+            return
+
+        self._closing = True
+        deadline = time.monotonic() + timeout
+        while (self._batch or not queue.empty()) and time.monotonic() < deadline:
+            await asyncio.sleep(DRAIN_POLL_SECONDS)
+
+        # Taken before cancelling, since the writer forgets its batch as it unwinds
+        leftover = list(self._batch)
+        writer.cancel()
+        try:
+            await writer
+        except asyncio.CancelledError:
+            pass
+
+        while not queue.empty():
+            leftover.append(queue.get_nowait())
+        self._fail(leftover, HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is shutting down, please retry",
+            headers={"Retry-After": "1"},
+        ))
+        # A later submit (e.g. after a restart on a new loop) starts a fresh writer
+        self._writer = None
+        self._loop = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue)
+            try:
+                await self._process(batch)
+            except Exception:
+                logger.exception("Order batch of %d failed", len(batch))
+                self._fail(batch, HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to place order"
+                ))
+            finally:
+                self._batch = []
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Checkout]:
+        """Wait for one checkout, then take whatever else arrives within max_wait"""
+        batch = self._batch = [await queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Callers that went away are not turned into orders
+        self._batch = [checkout for checkout in batch if not checkout.future.done()]
+        return self._batch
+
+    async def _process(self, batch: List[Checkout]) -> None:
+        for _ in range(MAX_BATCH_ATTEMPTS):
+            if await self._apply(batch):
+                return
+        self._fail(batch, HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Stock changed while placing the order, please retry"
+        ))
+
+    async def _apply(self, batch: List[Checkout]) -> bool:
+        """Run one batch in one transaction; False when stock moved underneath it"""
+        if not batch:
+            return True
+
+        product_ids = {product_id for checkout in batch for _, product_id, _, _ in checkout.lines}
+
+        async with AsyncSessionLocal() as db:
+            # Lock the hot rows once for the whole batch (a no-op on SQLite)
+            result = await db.execute(
+                select(Product.id, Product.name, Product.stock)
+                .filter(Product.id.in_(product_ids))
+                .with_for_update()
+            )
+            names = {}
+            stock: Dict[int, int] = {}
+            for product_id, name, available in result:
+                names[product_id] = name
+                stock[product_id] = available
+
+            accepted: List[Checkout] = []
+            rejected: List[Tuple[Checkout, HTTPException]] = []
+            needed: Dict[int, int] = defaultdict(int)
+
+            # First come, first served within the batch
+            for checkout in batch:
+                missing = [product_id for _, product_id, _, _ in checkout.lines if product_id not in stock]
+                if missing:
+                    rejected.append((checkout, HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Product {', '.join(str(product_id) for product_id in missing)} not found"
+                    )))
+                    continue
+
+                short = [
+                    product_id for _, product_id, quantity, _ in checkout.lines
+                    if stock[product_id] < quantity
+                ]
+                if short:
+                    rejected.append((checkout, HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Insufficient stock for " + ", ".join(
+                            f"{names[product_id]} (only {stock[product_id]} items available)" for product_id in short
+                        )
+                    )))
+                    continue
+
+                for _, product_id, quantity, _ in checkout.lines:
+                    stock[product_id] -= quantity
+                    needed[product_id] += quantity
+                accepted.append(checkout)
+
+            orders = []
+            if accepted:
+                # One conditional UPDATE for the whole batch
+                if not await db.run_sync(reserve_stock, dict(needed)):
+                    await db.rollback()
+                    return False
+
+                orders = [
+                    Order(
+                        user_id=checkout.user_id,
+                        total_amount=round(sum(quantity * price for _, _, quantity, price in checkout.lines), 2),
+                        status=OrderStatus.PENDING,
+                        items=[
+                            OrderItem(product_id=product_id, quantity=quantity, price=price)
+                            for _, product_id, quantity, price in checkout.lines
+                        ]
+                    )
+                    for checkout in accepted
+                ]
+                db.add_all(orders)
+
+                # Only the lines that were ordered, items added since stay in the cart
+                await db.execute(delete(CartItem).filter(CartItem.id.in_(
+                    [cart_item_id for checkout in accepted for cart_item_id, _, _, _ in checkout.lines]
+                )))
+
+                await db.flush()
+                await db.run_sync(record_orders, orders, 1)
+                await db.commit()
+
+        if accepted:
+            orders_placed.inc(len(accepted))
+        if rejected:
+            stock_rejections.labels("place_order").inc(
+                sum(1 for _, error in rejected if error.status_code == status.HTTP_400_BAD_REQUEST)
+            )
+
+        for checkout, order in zip(accepted, orders):
+            if not checkout.future.done():
+                checkout.future.set_result(order.id)
+        for checkout, error in rejected:
+            if not checkout.future.done():
+                checkout.future.set_exception(error)
+        return True
+
+    @staticmethod
+    def _fail(batch: List[Checkout], error: HTTPException) -> None:
+        for checkout in batch:
+            if not checkout.future.done():
+                checkout.future.set_exception(error)
+
+
+order_admission = OrderAdmissionQueue(
+    enabled=settings.ORDER_ADMISSION_ENABLED,
+    hot_products=[int(product_id) for product_id in settings.ORDER_ADMISSION_PRODUCTS.split(",") if product_id.strip()],
+    batch_size=settings.ORDER_ADMISSION_BATCH_SIZE,
+    max_wait=settings.ORDER_ADMISSION_MAX_WAIT_MS / 1000,
+    maxsize=settings.ORDER_ADMISSION_QUEUE_SIZE,
+)
@@ -0,0 +1,111 @@
+import hashlib
+from typing import Dict, Hashable, Optional
+from fastapi import Request, Response, status
+from core.config import settings
+from core.replica import CATALOG, mark_write
+from utils.cache import create_cache
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match header covers `etag`.
+
+    `*` matches any current representation; callers only check once one was
+    found, so a missing product still answers 404.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+class CatalogCache:
+    """
+    Serialized product responses tagged with a catalog version.
+
+    Any admin write to products bumps the version, which drops every cached
+    body at once, in every worker sharing the cache backend. Orders do not:
+    the stock in a cached body can lag by up to the TTL, while checkout
+    always checks the live stock.
+    ETags are derived from the body and headers actually served, so once a
+    body is rebuilt with new stock (or anything else) its ETag changes too.
+    Callers read `version` before querying the database and store under that
+    version, so a response built while a write was committing can never be
+    served under the newer version.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = create_cache("catalog", maxsize=maxsize, ttl=ttl)
+
+    @property
+    def version(self) -> str:
+        # A random token per write, shared by every worker with the sqlite backend
+        return self._entries.version()
+
+    async def current_version(self) -> str:
+        """`version`, read without blocking the event loop"""
+        return await self._entries.aversion()
+
+    def invalidate(self) -> None:
+        """Call after every committed admin write to products (create, update, stock, delete, import)"""
+        self._entries.bump_version()
+        self._entries.clear()
+        # The next responses are built from the primary, not a lagging replica
+        mark_write(CATALOG)
+
+    @staticmethod
+    def etag(body: bytes, headers: Dict[str, str]) -> str:
+        digest = hashlib.sha1(body)
+        for name, value in sorted(headers.items()):
+            digest.update(f"\0{name}:{value}".encode("utf-8"))
+        return f'"{digest.hexdigest()[:20]}"'
+
+    async def response(self, request: Request, version: str, key: Hashable) -> Optional[Response]:
+        """A 304 or cached response for `key`, or None when the database must be queried"""
+        entry = await self._entries.aget((version, key))
+        if entry is None:
+            return None
+
+        body, headers, etag = entry
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+        return self._build(body, headers, etag)
+
+    async def store(self, request: Request, version: str, key: Hashable, body: bytes,
+                    headers: Optional[Dict[str, str]] = None) -> Response:
+        """Cache a serialized JSON body and return it as a response (or a 304)"""
+        headers = headers or {}
+        etag = self.etag(body, headers)
+        await self._entries.aset((version, key), (body, headers, etag))
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+        return self._build(body, headers, etag)
+
+    def stats(self) -> Dict:
+        stats = self._entries.stats()
+        stats["version"] = self.version
+        return stats
+
+    def _not_modified(self, etag: str) -> Response:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+
+    def _build(self, body: bytes, headers: Dict[str, str], etag: str) -> Response:
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**headers, "ETag": etag, "Cache-Control": "no-cache"}
+        )
+
+
+catalog_cache = CatalogCache(
+    maxsize=settings.CATALOG_CACHE_SIZE,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS
+)
@@ -9,6 +9,21 @@ class Settings(BaseSettings):
     # Database - NO default value, must come from .env
     DATABASE_URL: str
     
+    # Connection pool (ignored for in-memory SQLite and the async SQLite driver)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1  # seconds, -1 disables recycling
+    DB_POOL_PRE_PING: bool = False
+    
+    # Optional read replica for read-only routes; empty sends every read to DATABASE_URL
+    READ_DATABASE_URL: str = ""
+    # After a user writes, their reads stay on the primary this long
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    
+    # Create missing tables on startup; turn off where alembic manages the schema
+    DB_CREATE_ALL: bool = True
+    
     # JWT Security - NO default value, must come from .env
     SECRET_KEY: str
     ALGORITHM: str = "HS256"  # This can have default
@@ -21,9 +36,50 @@ class Settings(BaseSettings):
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:8000"
     
+    # Password hashing (bcrypt work factor and dedicated worker threads)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    
+    # Cache backend: "memory" (per process) or "sqlite" (a file shared by every
+    # worker on the host; CACHE_PATH defaults to a per-database file in a
+    # private temp directory, and must be a file only this user can access)
+    CACHE_BACKEND: str = "memory"
+    CACHE_PATH: str = ""
+    
+    # Authenticated user cache (entries never outlive the token's exp)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
+    # Product read cache (dropped on every catalog write)
+    CATALOG_CACHE_SIZE: int = 1024
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+    
     # File Upload
     UPLOAD_DIRECTORY: str = "static/products"
     MAX_FILE_SIZE: int = 5242880  # 5MB in bytes
+    THUMBNAIL_SIZES: str = "150,300,600"  # comma-separated edge lengths in pixels
+    THUMBNAIL_WORKERS: int = 2
+    
+    # Bulk product import (rows per transaction)
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+    
+    # Request profiling (Server-Timing header and slow request log), off by default
+    PROFILING_ENABLED: bool = False
+    SLOW_REQUEST_THRESHOLD_MS: float = 500.0
+    
+    # Stored responses for Idempotency-Key retries of orders and cart writes
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    
+    # Group-commit checkout queue for flash sales, off by default
+    ORDER_ADMISSION_ENABLED: bool = False
+    ORDER_ADMISSION_PRODUCTS: str = ""  # comma-separated product ids, empty queues every checkout
+    ORDER_ADMISSION_BATCH_SIZE: int = 200
+    ORDER_ADMISSION_MAX_WAIT_MS: float = 5.0
+    ORDER_ADMISSION_QUEUE_SIZE: int = 10000
     
     class Config:
         env_file = str(BASE_DIR / "app" / ".env")
@@ -35,4 +91,4 @@ class Settings(BaseSettings):
 def get_settings() -> Settings:
     return Settings()
 
-settings = get_settings()
\ No newline at end of file
+settings = get_settings()
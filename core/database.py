@@ -1,20 +1,73 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from core.config import settings
+from core.pool import PoolStats, pool_options
 
 # Database URL - change this based on your database choice
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+# Async driver used for each backend when building the async engine
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Rewrite a DATABASE_URL to use the async driver of its backend"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    
+    url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+
+# Checkout wait times and timeouts, per engine
+pool_stats = {
+    "sync": PoolStats(),
+    "async": PoolStats(),
+}
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     # Only needed for SQLite
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {},
+    **pool_options(SQLALCHEMY_DATABASE_URL, QueuePool, pool_stats["sync"])
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for `async def` routes, sharing the same database
+ASYNC_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **pool_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, pool_stats["async"])
+)
+
+# Objects stay loaded after commit: lazy loads are not possible in async code
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Read replica for read-only routes (see core/replica.py); the primary without one
+READ_REPLICA = bool(settings.READ_DATABASE_URL)
+if READ_REPLICA:
+    pool_stats["async_read"] = PoolStats()
+    ASYNC_READ_DATABASE_URL = get_async_database_url(settings.READ_DATABASE_URL)
+    async_read_engine = create_async_engine(
+        ASYNC_READ_DATABASE_URL,
+        **pool_options(ASYNC_READ_DATABASE_URL, AsyncAdaptedQueuePool, pool_stats["async_read"])
+    )
+else:
+    async_read_engine = async_engine
+
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -24,4 +77,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
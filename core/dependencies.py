@@ -1,19 +1,64 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
-from core.database import get_db
+import time
+from datetime import datetime
+from typing import Any, Dict
+from core.database import READ_REPLICA, AsyncSessionLocal
+from core.replica import amark_write, get_async_read_db
 from models.user import User, UserRole
 from schemas.user import TokenData
 from core.config import settings
+from utils.cache import create_cache
 
 #   The tokenUrl to match your login endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Authenticated users keyed by token subject, so most requests skip the users lookup
+principal_cache = create_cache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
 
-def get_current_user(
+
+def _principal(user: User) -> Dict[str, Any]:
+    """The fields routes read from the current user, never the password hash"""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "role": user.role.value,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "order_cancellation_count": user.order_cancellation_count,
+    }
+
+
+def _user_from_principal(principal: Dict[str, Any]) -> User:
+    """A detached User holding only the cached principal fields"""
+    created_at = principal["created_at"]
+    return User(
+        id=principal["id"],
+        email=principal["email"],
+        username=principal["username"],
+        role=UserRole(principal["role"]),
+        created_at=datetime.fromisoformat(created_at) if created_at else None,
+        order_cancellation_count=principal["order_cancellation_count"],
+    )
+
+
+async def invalidate_principal(email: str) -> None:
+    """Drop a cached user after their role or order_cancellation_count changes"""
+    await principal_cache.adelete(email)
+    # Their next lookup must not read the old row from a lagging replica
+    await amark_write(email)
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ) -> User:
     """Get current authenticated user from JWT token"""
     
@@ -35,15 +80,35 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    principal = await principal_cache.aget(token_data.email)
+    if principal is not None:
+        return _user_from_principal(principal)
+    
+    user = await db.scalar(select(User).filter(User.email == token_data.email))
+    
+    if user is None and READ_REPLICA:
+        # A user who just registered may not have reached the replica yet
+        async with AsyncSessionLocal() as primary:
+            user = await primary.scalar(select(User).filter(User.email == token_data.email))
+            if user is not None:
+                primary.expunge(user)
+    elif user is not None:
+        # Detach so the instance outlives this request's session
+        db.expunge(user)
     
     if user is None:
         raise credentials_exception
+    expires_at = payload.get("exp")
+    await principal_cache.aset(
+        token_data.email,
+        _principal(user),
+        ttl=expires_at - time.time() if expires_at else None
+    )
     
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
     """Require user to be admin"""
     
     if current_user.role != UserRole.ADMIN:
@@ -55,7 +120,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def require_customer(current_user: User = Depends(get_current_user)) -> User:
+async def require_customer(current_user: User = Depends(get_current_user)) -> User:
     """Require user to be customer"""
     
     if current_user.role != UserRole.CUSTOMER:
@@ -0,0 +1,234 @@
+"""
+Idempotency-Key support for non-idempotent endpoints.
+
+A client that sends `Idempotency-Key: <key>` with a write gets the same
+response for every retry of it: the first response is stored (per user,
+for IDEMPOTENCY_TTL_SECONDS) and replayed with `Idempotent-Replayed: true`
+without running the handler again. A retry that arrives while the first
+attempt is still running waits for it instead of racing it. Server errors,
+conflicts and other answers that a retry could change (RETRYABLE_STATUSES)
+are not stored, so the retry runs again.
+"""
+import asyncio
+import hashlib
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Pattern, Tuple
+from starlette.datastructures import Headers
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.config import settings
+from core.metrics import idempotent_replays
+from utils.cache import create_cache
+from utils.security import token_subject
+from utils.serialization import dumps
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+CLAIM_TTL_SECONDS = 60
+CLAIM_POLL_SECONDS = 0.05
+# Besides 5xx (such as the 503 of a full order queue): 409 for a write that raced
+# another one, 429 for a rate limit
+RETRYABLE_STATUSES = {409, 429}
+
+
+def _storable(status_code: int) -> bool:
+    """Whether a response is final for its key rather than worth retrying"""
+    return status_code < 500 and status_code not in RETRYABLE_STATUSES
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StoredResponse":
+        # The sqlite backend returns header pairs as lists
+        return cls(data["fingerprint"], data["status"], [tuple(pair) for pair in data["headers"]], data["body"])
+
+
+class IdempotencyStore:
+    """
+    Completed responses with a TTL, plus claims on the keys whose first
+    attempt is still running.
+
+    Claims live in the cache too, so with the sqlite backend a retry that
+    lands on another worker also waits. Waiters in the claiming process are
+    woken by an event; other processes poll.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._responses = create_cache("idempotency", maxsize=maxsize, ttl=ttl)
+        self._in_flight: Dict[Hashable, asyncio.Event] = {}
+
+    async def get(self, key: Hashable) -> Optional[StoredResponse]:
+        data = await self._responses.aget(key)
+        return None if data is None else StoredResponse.from_dict(data)
+
+    async def set(self, key: Hashable, response: StoredResponse) -> None:
+        await self._responses.aset(key, asdict(response))
+
+    async def acquire(self, key: Hashable) -> Optional[StoredResponse]:
+        """
+        Wait until no other request holds `key`. Returns the stored response
+        if one exists by then; otherwise this request now holds the key and
+        must call `release` when done.
+        """
+        while True:
+            event = self._in_flight.get(key)
+            if event is not None:
+                await event.wait()
+                continue
+
+            stored = await self.get(key)
+            if stored is not None:
+                return stored
+            # A claim outlives a crashed worker by at most CLAIM_TTL_SECONDS
+            if await self._responses.aadd(("claim", *key), True, ttl=CLAIM_TTL_SECONDS):
+                self._in_flight[key] = asyncio.Event()
+                return None
+            await asyncio.sleep(CLAIM_POLL_SECONDS)
+
+    async def release(self, key: Hashable) -> None:
+        try:
+            await self._responses.adelete(("claim", *key))
+        finally:
+            # Waiters in this process are woken even if the delete was cancelled
+            event = self._in_flight.pop(key, None)
+            if event is not None:
+                event.set()
+
+    def stats(self) -> Dict:
+        stats = self._responses.stats()
+        stats["in_flight"] = len(self._in_flight)
+        return stats
+
+
+idempotency_store = IdempotencyStore(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS
+)
+
+
+class IdempotencyMiddleware:
+    """
+    Plain ASGI middleware applying Idempotency-Key to the given routes.
+
+    `routes` are (method, path template) pairs such as
+    ("PUT", "/api/cart/items/{product_id}"). Requests to other routes, and
+    requests without the header or without a valid token, pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Iterable[Tuple[str, str]], store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+        self.routes: List[Tuple[str, str, Pattern]] = [
+            (method, path, compile_path(path)[0]) for method, path in routes
+        ]
+
+    def _match(self, scope: Scope) -> Optional[str]:
+        for method, path, pattern in self.routes:
+            if scope["method"] == method and pattern.match(scope["path"]):
+                return path
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._match(scope)
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(HEADER)
+        if route is None or idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await self._error(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        principal = token_subject(headers.get("authorization"))
+        if principal is None:
+            # Let the route answer 401 as usual
+            await self.app(scope, receive, send)
+            return
+
+        # The body is read up front so retries can be compared with the original
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+
+        key = (principal, idempotency_key)
+        stored = await self.store.acquire(key)
+        if stored is not None:
+            await self._replay(stored, fingerprint, route, send)
+            return
+
+        try:
+            await self._run(scope, receive, send, body, key, fingerprint)
+        finally:
+            await self.store.release(key)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, body: bytes, key: Hashable,
+                   fingerprint: str) -> None:
+        sent = False
+
+        async def replay_body() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Only disconnects are left to receive
+            return await receive()
+
+        response = {}
+        chunks = []
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and _storable(response["status"]):
+                    await self.store.set(key, StoredResponse(
+                        fingerprint, response["status"], response["headers"], b"".join(chunks)
+                    ))
+            await send(message)
+
+        await self.app(scope, replay_body, capture)
+
+    async def _replay(self, stored: StoredResponse, fingerprint: str, route: str, send: Send) -> None:
+        if stored.fingerprint != fingerprint:
+            await self._error(send, 422, "Idempotency-Key was already used for a different request")
+            return
+
+        idempotent_replays.labels(route).inc()
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+    @staticmethod
+    async def _error(send: Send, status_code: int, detail: str) -> None:
+        body = dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
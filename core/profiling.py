@@ -0,0 +1,114 @@
+import heapq
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Slowest statements kept per request for the slow-request log
+SLOWEST_STATEMENTS = 5
+
+
+class RequestProfile:
+    """SQL statement count and database time of one request"""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self._slowest: List[Tuple[float, int, str]] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        entry = (seconds, self.statements, statement)
+        if len(self._slowest) < SLOWEST_STATEMENTS:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    def slowest(self) -> List[Tuple[float, str]]:
+        return [(seconds, statement) for seconds, _, statement in sorted(self._slowest, reverse=True)]
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'total;dur={total_seconds * 1000:.2f}, '
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} statements"'
+        )
+
+
+# Set for the duration of a profiled request; sync routes see it through the
+# threadpool's copied context and async sessions through SQLAlchemy's greenlets
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is not None and starts:
+        profile.record(statement, time.perf_counter() - starts.pop())
+
+
+def install_query_hooks(*engines: Engine) -> None:
+    """Time every statement on the given (sync) engines while a request is profiled"""
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfilingMiddleware:
+    """
+    Adds a Server-Timing header with wall time, statement count and DB time,
+    and logs requests slower than `threshold_ms` with their slowest statements.
+
+    Plain ASGI middleware, so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, threshold_ms: float):
+        self.app = app
+        self.threshold_ms = threshold_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                self._log_slow_request(scope, elapsed_ms, profile)
+
+    @staticmethod
+    def _log_slow_request(scope: Scope, elapsed_ms: float, profile: RequestProfile) -> None:
+        lines = [
+            f"  {seconds * 1000:8.2f} ms  {' '.join(statement.split())[:500]}"
+            for seconds, statement in profile.slowest()
+        ]
+        logger.warning(
+            "Slow request %s %s: %.1f ms, %d statements, %.1f ms in the database%s",
+            scope["method"], scope["path"], elapsed_ms, profile.statements,
+            profile.db_seconds * 1000, "".join("\n" + line for line in lines)
+        )
@@ -0,0 +1,89 @@
+"""
+Read replica routing with read-your-writes.
+
+Read-only routes take their session from `get_async_read_db` (or
+`get_async_catalog_db` for product reads), which uses READ_DATABASE_URL when
+one is configured. A replica may lag behind the primary, so reads go to the
+primary for READ_YOUR_WRITES_SECONDS after:
+
+- the requesting user made a successful write (marked by RecentWritesMiddleware,
+  or by invalidate_principal for changes made to them by someone else);
+- any catalog write, for product reads, because those responses are cached
+  under the new catalog version.
+
+Markers live in the configured cache backend, so with CACHE_BACKEND=sqlite
+a write in one worker routes the user's next read in any worker.
+"""
+from typing import Hashable, Optional
+from fastapi import Request
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.config import settings
+from core.database import READ_REPLICA, AsyncSessionLocal, AsyncReadSessionLocal
+from utils.cache import create_cache
+from utils.security import token_subject
+
+# Marker for writes that change product responses
+CATALOG = ("catalog",)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+recent_writes = create_cache(
+    "recent_writes",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.READ_YOUR_WRITES_SECONDS
+)
+
+
+def mark_write(subject: Optional[Hashable]) -> None:
+    """Keep `subject` (a user's email, or CATALOG) on the primary for a while"""
+    if READ_REPLICA and subject is not None:
+        recent_writes.set(subject, True)
+
+
+async def amark_write(subject: Optional[Hashable]) -> None:
+    """`mark_write` for async code"""
+    if READ_REPLICA and subject is not None:
+        await recent_writes.aset(subject, True)
+
+
+async def _sessionmaker(request: Request, *subjects):
+    if not READ_REPLICA:
+        return AsyncSessionLocal
+    principal = token_subject(request.headers.get("authorization"))
+    for subject in (principal, *subjects):
+        if subject is not None and await recent_writes.aget(subject):
+            return AsyncSessionLocal
+    return AsyncReadSessionLocal
+
+
+# Dependency to get a session for read-only routes
+async def get_async_read_db(request: Request):
+    async with (await _sessionmaker(request))() as db:
+        yield db
+
+
+# Same, for routes whose responses go into the catalog cache
+async def get_async_catalog_db(request: Request):
+    async with (await _sessionmaker(request, CATALOG))() as db:
+        yield db
+
+
+class RecentWritesMiddleware:
+    """Plain ASGI middleware marking the user behind every successful write"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marking(message: Message) -> None:
+            # Marked before the client sees the response, so its next read is covered
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                await amark_write(token_subject(Headers(scope=scope).get("authorization")))
+            await send(message)
+
+        await self.app(scope, receive, send_marking)
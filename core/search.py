@@ -0,0 +1,106 @@
+import re
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import Connection
+from models.product import Product
+
+# SQLite: external-content FTS5 table kept in sync with products by triggers.
+# Only name/description changes touch the index, so stock updates stay cheap.
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+# Postgres: generated tsvector column (name weighted above description) + GIN index
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+SQLITE_SEARCH_QUERY = """
+    SELECT products.* FROM products_fts
+    JOIN products ON products.id = products_fts.rowid
+    WHERE products_fts MATCH :query
+    ORDER BY bm25(products_fts, 10.0, 1.0), products.id
+    LIMIT :limit OFFSET :skip
+"""
+
+POSTGRES_SEARCH_QUERY = """
+    SELECT products.* FROM products, websearch_to_tsquery('english', :query) AS query
+    WHERE products.search_vector @@ query
+    ORDER BY ts_rank(products.search_vector, query) DESC, products.id
+    LIMIT :limit OFFSET :skip
+"""
+
+
+def create_search_index(connection: Connection) -> None:
+    """Create the full-text index for products if it does not exist yet (idempotent)"""
+    dialect = connection.dialect.name
+
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")
+        ).first()
+        for statement in SQLITE_SEARCH_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Index products that were inserted before the triggers existed
+            connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+    elif dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.execute(text(statement))
+
+
+def fts5_query(q: str) -> str:
+    """Quote every word for FTS5 and prefix-match the last one"""
+    words = [word.replace('"', '""') for word in re.findall(r"\w+", q)]
+    if not words:
+        return ""
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def search_statement(dialect: str, q: str, skip: int, limit: int):
+    """Ranked product search for the given dialect (LIKE fallback elsewhere)"""
+    if dialect == "sqlite":
+        return select(Product).from_statement(
+            text(SQLITE_SEARCH_QUERY).bindparams(query=fts5_query(q), skip=skip, limit=limit)
+        )
+
+    if dialect == "postgresql":
+        return select(Product).from_statement(
+            text(POSTGRES_SEARCH_QUERY).bindparams(query=q, skip=skip, limit=limit)
+        )
+
+    pattern = f"%{q}%"
+    return select(Product).filter(
+        or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+    ).order_by(Product.name, Product.id).offset(skip).limit(limit)
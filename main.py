@@ -1,38 +1,118 @@
-from fastapi import FastAPI
-from core.database import engine
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
+from core.admission import order_admission
+from core.config import settings
+from core.database import READ_REPLICA, engine, async_engine, async_read_engine, pool_stats
+from core.idempotency import IdempotencyMiddleware
+from core.metrics import CONTENT_TYPE, MetricsMiddleware, registry, track_pool
+from core.replica import RecentWritesMiddleware
+from core.search import create_search_index
+from utils.images import UploadLimitMiddleware
 from models import Base
 import os
-from routers import auth, products, cart, orders    
+from routers import auth, products, cart, orders, admin, analytics
 from fastapi.staticfiles import StaticFiles
-app = FastAPI(
-    title="Mini E-Commerce API",
-    version="1.0",
-    description="Mini E-Commerce API | AppifyDevs | Mirza Salem | 2026",
-    )
 
-# app.mount("/static", StaticFiles(directory="static"), name="static")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-app.mount(
-    "/static",
-    StaticFiles(directory=os.path.join(BASE_DIR, "static")),
-    name="static"
-)
-# Create all tables
-Base.metadata.create_all(bind=engine)
-
-
-# For included routers
-app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(products.router, prefix="/api/products", tags=["Products"])
-app.include_router(cart.router, prefix="/api/cart", tags=["Cart"])
-app.include_router(orders.router, prefix="/api/orders", tags=["Orders"])
-
-
-@app.get("/")
-def root():
-    return {
-        "message": "Mini E-Commerce API",
-        "Owner": "Mirza Salem",
-        "Project Link": "https://github.com/mirzasalem/mini_e-Commerce_api"
-    }
+
+def init_db() -> None:
+    """Create missing tables and the product search index"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        create_search_index(connection)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation is for local use; turn it off where migrations own the schema
+    if settings.DB_CREATE_ALL:
+        await run_in_threadpool(init_db)
+    yield
+    # Finish queued checkouts before the engines they write through go away
+    await order_admission.stop()
+    if READ_REPLICA:
+        await async_read_engine.dispose()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def create_app() -> FastAPI:
+    """Build the application; nothing touches the database until startup"""
+    app = FastAPI(
+        title="Mini E-Commerce API",
+        version="1.0",
+        description="Mini E-Commerce API | AppifyDevs | Mirza Salem | 2026",
+        lifespan=lifespan,
+        )
+
+    app.mount(
+        "/static",
+        StaticFiles(directory=os.path.join(BASE_DIR, "static")),
+        name="static"
+    )
+
+
+    # Idempotency-Key replay for order placement and cart writes
+    app.add_middleware(IdempotencyMiddleware, routes=[
+        ("POST", "/api/orders/"),
+        ("POST", "/api/cart/items"),
+        ("POST", "/api/cart/batch"),
+        ("PUT", "/api/cart/items/{product_id}"),
+        ("DELETE", "/api/cart/items/{product_id}"),
+        ("DELETE", "/api/cart/clear"),
+    ])
+
+
+    # Oversize image uploads are refused before their body is read
+    app.add_middleware(UploadLimitMiddleware, routes=[("POST", "/api/products/")])
+
+
+    # Read-your-writes for routes served from the read replica
+    if READ_REPLICA:
+        app.add_middleware(RecentWritesMiddleware)
+
+
+    # Opt-in request profiling
+    if settings.PROFILING_ENABLED:
+        from core.profiling import ProfilingMiddleware, install_query_hooks
+
+        install_query_hooks(engine, async_engine.sync_engine, *([async_read_engine.sync_engine] if READ_REPLICA else []))
+        app.add_middleware(ProfilingMiddleware, threshold_ms=settings.SLOW_REQUEST_THRESHOLD_MS)
+
+
+    # Prometheus metrics
+    if settings.METRICS_ENABLED:
+        track_pool("sync", engine.pool, pool_stats["sync"])
+        track_pool("async", async_engine.sync_engine.pool, pool_stats["async"])
+        if READ_REPLICA:
+            track_pool("async_read", async_read_engine.sync_engine.pool, pool_stats["async_read"])
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+    # For included routers
+    app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
+    app.include_router(products.router, prefix="/api/products", tags=["Products"])
+    app.include_router(cart.router, prefix="/api/cart", tags=["Cart"])
+    app.include_router(orders.router, prefix="/api/orders", tags=["Orders"])
+    app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+    app.include_router(analytics.router, prefix="/api/admin/analytics", tags=["Analytics"])
+
+
+    @app.get("/")
+    def root():
+        return {
+            "message": "Mini E-Commerce API",
+            "Owner": "Mirza Salem",
+            "Project Link": "https://github.com/mirzasalem/mini_e-Commerce_api"
+        }
+
+    return app
+
+
+app = create_app()
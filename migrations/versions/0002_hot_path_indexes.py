@@ -0,0 +1,58 @@
+"""Add indexes for keyset pages, order and cart lookups, unique (cart_id, product_id)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A database stamped at 0001 may have been created by a create_all that already had some of these
+    # Keyset pagination seeks on (created_at, id)
+    op.create_index("ix_products_created_at_id", "products", ["created_at", "id"], if_not_exists=True)
+    op.create_index("ix_orders_created_at_id", "orders", ["created_at", "id"], if_not_exists=True)
+    # Covers user_id lookups and a customer's newest-first order history
+    op.create_index("ix_orders_user_id_created_at", "orders", ["user_id", "created_at", "id"], if_not_exists=True)
+    op.create_index("ix_orders_status", "orders", ["status"], if_not_exists=True)
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"], if_not_exists=True)
+    op.create_index("ix_cart_items_product_id", "cart_items", ["product_id"], if_not_exists=True)
+
+    # Merge duplicate cart lines into the oldest one before enforcing uniqueness
+    op.execute("""
+        UPDATE cart_items SET quantity = (
+            SELECT SUM(duplicate.quantity) FROM cart_items AS duplicate
+            WHERE duplicate.cart_id = cart_items.cart_id
+            AND duplicate.product_id = cart_items.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_items
+            GROUP BY cart_id, product_id HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM cart_items WHERE id NOT IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id
+        )
+    """)
+    # Also serves lookups by cart_id alone, so no separate cart_id index is needed
+    op.create_index("uq_cart_items_cart_product", "cart_items", ["cart_id", "product_id"], unique=True,
+                    if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_cart_items_cart_product", table_name="cart_items")
+    op.drop_index("ix_cart_items_product_id", table_name="cart_items")
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_orders_status", table_name="orders")
+    op.drop_index("ix_orders_user_id_created_at", table_name="orders")
+    op.drop_index("ix_orders_created_at_id", table_name="orders")
+    op.drop_index("ix_products_created_at_id", table_name="products")
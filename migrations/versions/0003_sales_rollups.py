@@ -0,0 +1,61 @@
+"""Add daily_sales and product_daily_sales rollups, backfilled from orders
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_sales",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "product_daily_sales",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), primary_key=True),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+    )
+
+    # Same as `python -m utils.rollups rebuild`, kept in SQL so this revision
+    # does not depend on the models as they evolve
+    op.execute("""
+        INSERT INTO daily_sales (day, orders, units, revenue)
+        SELECT date(orders.created_at), COUNT(orders.id),
+               COALESCE(SUM(order_units.units), 0), SUM(orders.total_amount)
+        FROM orders
+        LEFT OUTER JOIN (
+            SELECT order_id, SUM(quantity) AS units FROM order_items GROUP BY order_id
+        ) AS order_units ON order_units.order_id = orders.id
+        WHERE orders.status != 'CANCELLED'
+        GROUP BY date(orders.created_at)
+    """)
+    op.execute("""
+        INSERT INTO product_daily_sales (day, product_id, units, revenue)
+        SELECT date(orders.created_at), order_items.product_id,
+               SUM(order_items.quantity), SUM(order_items.quantity * order_items.price)
+        FROM order_items
+        JOIN orders ON orders.id = order_items.order_id
+        WHERE orders.status != 'CANCELLED'
+        GROUP BY date(orders.created_at), order_items.product_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("product_daily_sales")
+    op.drop_table("daily_sales")
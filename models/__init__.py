@@ -2,6 +2,7 @@ from models.user import User
 from models.product import Product
 from models.cart import Cart, CartItem
 from models.order import Order, OrderItem
+from models.analytics import DailySales, ProductDailySales
 from core.database import Base
 
-__all__ = ["Base", "User", "Product", "Cart", "CartItem", "Order", "OrderItem"]
\ No newline at end of file
+__all__ = ["Base", "User", "Product", "Cart", "CartItem", "Order", "OrderItem", "DailySales", "ProductDailySales"]
\ No newline at end of file
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, Date
+from core.database import Base
+
+
+# Sales rollups, kept up to date by utils.rollups as orders are placed and
+# cancelled. Only orders that are not cancelled are counted, on the UTC day
+# they were placed.
+
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+
+class ProductDailySales(Base):
+    __tablename__ = "product_daily_sales"
+
+    day = Column(Date, primary_key=True)
+    # No foreign key: sales history outlives deleted products
+    product_id = Column(Integer, primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
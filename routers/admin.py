@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from models.user import User
+from core.database import READ_REPLICA, engine, async_engine, async_read_engine, pool_stats
+from core.dependencies import require_admin, principal_cache
+from core.catalog import catalog_cache
+from core.idempotency import idempotency_store
+from core.pool import pool_status
+
+router = APIRouter()
+
+
+@router.get("/cache")
+def get_cache_stats(current_user: User = Depends(require_admin)):
+    """Hit/miss counters of the caches (Admin only)"""
+    return {
+        "principals": principal_cache.stats(),
+        "catalog": catalog_cache.stats(),
+        "idempotency": idempotency_store.stats(),
+    }
+
+
+@router.get("/db/pool")
+def get_pool_stats(current_user: User = Depends(require_admin)):
+    """Connection pool occupancy, checkout wait times and timeouts (Admin only)"""
+    return {
+        "sync": pool_status(engine.pool, pool_stats["sync"]),
+        "async": pool_status(async_engine.sync_engine.pool, pool_stats["async"]),
+        **({"async_read": pool_status(async_read_engine.sync_engine.pool, pool_stats["async_read"])}
+           if READ_REPLICA else {}),
+    }
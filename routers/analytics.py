@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from core.database import get_async_db
+from core.dependencies import require_admin
+from models.analytics import DailySales, ProductDailySales
+from models.product import Product
+from models.user import User
+from schemas.analytics import DailySalesResponse, ProductSalesResponse
+
+router = APIRouter()
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+async def date_range(start: Optional[date] = None, end: Optional[date] = None) -> Tuple[date, date]:
+    """Inclusive day range, the last 30 days (UTC) by default"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {MAX_RANGE_DAYS} days"
+        )
+    return start, end
+
+
+@router.get("/daily", response_model=List[DailySalesResponse])
+async def get_daily_sales(
+    days: Tuple[date, date] = Depends(date_range),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin)
+    ):
+    """Orders, units and revenue per day, days without sales included (Admin only)"""
+    start, end = days
+    result = await db.execute(
+        select(DailySales).filter(DailySales.day >= start, DailySales.day <= end)
+    )
+    rows = {row.day: row for row in result.scalars()}
+
+    response = []
+    day = start
+    while day <= end:
+        row = rows.get(day)
+        response.append({
+            "day": day,
+            "orders": row.orders if row else 0,
+            "units": row.units if row else 0,
+            "revenue": round(row.revenue, 2) if row else 0.0,
+        })
+        day += timedelta(days=1)
+    return response
+
+
+@router.get("/top-products", response_model=List[ProductSalesResponse])
+async def get_top_products(
+    days: Tuple[date, date] = Depends(date_range),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin)
+    ):
+    """Best-selling products by units over a day range, the last 30 days by default (Admin only)"""
+    start, end = days
+    units = func.sum(ProductDailySales.units).label("units")
+    revenue = func.sum(ProductDailySales.revenue).label("revenue")
+
+    totals = (
+        select(ProductDailySales.product_id, units, revenue)
+        .filter(ProductDailySales.day >= start, ProductDailySales.day <= end)
+        .group_by(ProductDailySales.product_id)
+        .having(units > 0)
+        .order_by(units.desc(), ProductDailySales.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    result = await db.execute(
+        select(totals.c.product_id, Product.name, totals.c.units, totals.c.revenue)
+        .outerjoin(Product, Product.id == totals.c.product_id)
+        .order_by(totals.c.units.desc(), totals.c.product_id)
+    )
+
+    return [
+        {"product_id": product_id, "name": name, "units": units, "revenue": round(revenue, 2)}
+        for product_id, name, units, revenue in result
+    ]
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from core.database import get_db
@@ -6,7 +7,7 @@ from schemas.user import UserCreate, UserLogin, UserResponse, Token
 from models.user import User, UserRole
 from models.cart import Cart
 from core.config import settings
-from utils.security import get_password_hash, verify_password, create_access_token
+from utils.security import get_password_hash_async, verify_password_async, create_access_token
 from core.dependencies import get_current_user
 from datetime import timedelta
 
@@ -19,9 +20,8 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current logged-in user information"""
     return current_user
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+def _check_new_user(db: Session, user_data: UserCreate) -> None:
+    """Reject registrations with an email or username already in use"""
     
     # Check if email already exists
     if db.query(User).filter(User.email == user_data.email).first():
@@ -36,9 +36,10 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Already this username is registered"
         )
-    
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+
+
+def _create_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
+    """Insert the user together with their cart"""
     new_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -47,59 +48,83 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    db.flush()
     
     # Create cart for the user
     new_cart = Cart(user_id=new_user.id)
     db.add(new_cart)
     db.commit()
+    db.refresh(new_user)
     
     return new_user
 
 
+def _find_user(db: Session, login: str, by_username: bool = False):
+    """Find a user by email, optionally falling back to username"""
+    user = db.query(User).filter(User.email == login).first()
+    if not user and by_username:
+        user = db.query(User).filter(User.username == login).first()
+    return user
+
+
+def _token_response(user: User) -> dict:
+    """Create an access token for the user"""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.email, "role": user.role.value},
+        expires_delta=access_token_expires
+    )
+    
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": user
+    }
+
+
+# Auth routes are async: database work runs in the regular threadpool while
+# bcrypt is awaited on its own pool, so a login burst cannot starve other routes
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    """Register a new user"""
+    
+    await run_in_threadpool(_check_new_user, db, user_data)
+    
+    # Create new user
+    hashed_password = await get_password_hash_async(user_data.password)
+    return await run_in_threadpool(_create_user, db, user_data, hashed_password)
+
+
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     Use email as username
     """
     
     # Try to find user by email first, then username
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user: #check 
-        user = db.query(User).filter(User.username == form_data.username).first()
+    user = await run_in_threadpool(_find_user, db, form_data.username, True)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="wrong email/ username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value},
-        expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    return _token_response(user)
 
 
 @router.post("/login/json", response_model=Token)
-def login_json(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_json(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """
     JSON-based login endpoint for frontend applications
     """
     
     # Find user by email
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+    user = await run_in_threadpool(_find_user, db, user_credentials.email)
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -107,17 +132,4 @@ def login_json(user_credentials: UserLogin, db: Session = Depends(get_db)):
             
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value},
-        expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
-
-
+    return _token_response(user)
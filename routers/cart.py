@@ -1,44 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from core.database import get_db
-from schemas.cart import CartResponse, CartItemCreate, CartItemUpdate
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Optional
+from core.database import get_async_db
+from schemas.cart import CartResponse, CartItemCreate, CartItemUpdate, CartBatchRequest
 from models.cart import Cart, CartItem
 from models.product import Product
 from models.user import User
 from core.dependencies import get_current_user
+from core.metrics import stock_rejections
+from utils.fieldsets import Selection, fieldset, load_options, project
+from utils.serialization import dumps
 
 router = APIRouter()
 
 
+async def load_cart(db: AsyncSession, user_id: int, selection: Optional[Selection] = None):
+    """
+    Load a user's cart with its items and their products (one query per level)
+
+    With a `selection`, only the columns behind the selected fields are read.
+    """
+    if selection is None:
+        options = [selectinload(Cart.items).selectinload(CartItem.product)]
+    else:
+        options = load_options(selection, CartResponse, Cart, required=["user_id"])
+    
+    return await db.scalar(
+        select(Cart).options(*options).filter(
+            Cart.user_id == user_id
+        ).execution_options(populate_existing=True)
+    )
+
+
+async def get_user_cart(db: AsyncSession, user_id: int):
+    """Get a user's cart without its items"""
+    return await db.scalar(select(Cart).filter(Cart.user_id == user_id))
+
+
 @router.get("/", response_model=CartResponse)
-def get_cart(
-    db: Session = Depends(get_db),
+async def get_cart(
+    selection: Optional[Selection] = Depends(fieldset(CartResponse)),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
     ):
-    """Get current user's cart"""
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    """
+    Get current user's cart
+
+    `?fields=items.quantity,items.product.name` returns only the listed fields.
+    """
+    cart = await load_cart(db, current_user.id, selection)
     
     if not cart:
         # Create cart if doesn't exist
         cart = Cart(user_id=current_user.id)
         db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        await db.commit()
+        cart = await load_cart(db, current_user.id, selection)
     
+    if selection is not None:
+        return Response(dumps(project(cart, selection, CartResponse)), media_type="application/json")
     
     return cart
 
 
 @router.post("/items", response_model=CartResponse, status_code=status.HTTP_201_CREATED)
-def add_to_cart(
+async def add_to_cart(
     item_data: CartItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
     ):
     """Add product to cart"""
     
     # Check if product exists
-    product = db.query(Product).filter(Product.id == item_data.product_id).first()
+    product = await db.scalar(select(Product).filter(Product.id == item_data.product_id))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -47,6 +84,7 @@ def add_to_cart(
     
     # Check if enough stock available
     if product.stock < item_data.quantity:
+        stock_rejections.labels("add_to_cart").inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Insufficient stock. Only {product.stock} items available"
@@ -59,23 +97,23 @@ def add_to_cart(
         )
     
     # Get or create cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = await get_user_cart(db, current_user.id)
     if not cart:
         cart = Cart(user_id=current_user.id)
         db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        await db.commit()
     
     # Check if product already in cart
-    existing_item = db.query(CartItem).filter(
+    existing_item = await db.scalar(select(CartItem).filter(
         CartItem.cart_id == cart.id,
         CartItem.product_id == item_data.product_id
-    ).first()
+    ))
     
     if existing_item:
         # Update quantity
         new_quantity = existing_item.quantity + item_data.quantity
         if new_quantity > product.stock:
+            stock_rejections.labels("add_to_cart").inc()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Cannot add {item_data.quantity} more. Only {product.stock - existing_item.quantity} items available"
@@ -90,32 +128,117 @@ def add_to_cart(
         )
         db.add(new_cart_item)
     
-    db.commit()
-    db.refresh(cart)
+    await db.commit()
     
-    return cart
+    return await load_cart(db, current_user.id)
+
+
+@router.post("/batch", response_model=CartResponse)
+async def batch_update_cart(
+    batch: CartBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+    ):
+    """
+    Apply a list of add/set/remove operations to the cart in one transaction
+
+    Operations run in order. `set` creates the line if it is missing and
+    `remove` of a product that is not in the cart is a no-op, so replaying
+    an offline edit log is safe. Nothing is saved if any operation fails.
+    A batch that races another write to the same cart gets 409 and can be
+    retried as is.
+    """
+    
+    cart = await load_cart(db, current_user.id)
+    if not cart:
+        cart = Cart(user_id=current_user.id, items=[])
+        db.add(cart)
+    
+    lines = {item.product_id: item for item in cart.items}
+    products = {item.product_id: item.product for item in cart.items}
+    
+    # Fetch every product the batch touches that is not already in the cart
+    missing_ids = {operation.product_id for operation in batch.operations} - set(products)
+    if missing_ids:
+        result = await db.execute(select(Product).filter(Product.id.in_(missing_ids)))
+        products.update({product.id: product for product in result.scalars()})
+    
+    # Replay the operations on the quantities in memory
+    quantities = {product_id: item.quantity for product_id, item in lines.items()}
+    for index, operation in enumerate(batch.operations):
+        if operation.op == "remove":
+            quantities.pop(operation.product_id, None)
+            continue
+        
+        if operation.product_id not in products:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Operation {index}: product {operation.product_id} not found"
+            )
+        
+        if operation.op == "add":
+            quantities[operation.product_id] = quantities.get(operation.product_id, 0) + operation.quantity
+        else:
+            quantities[operation.product_id] = operation.quantity
+    
+    # Check stock once per product the batch increased, reporting every shortfall together.
+    # Lines it left alone or lowered stay valid even if stock has dropped since.
+    short = [
+        f"{products[product_id].name} (only {products[product_id].stock} items available)"
+        for product_id, quantity in quantities.items()
+        if quantity > products[product_id].stock
+        and (product_id not in lines or quantity > lines[product_id].quantity)
+    ]
+    if short:
+        stock_rejections.labels("batch_update_cart").inc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient stock for " + ", ".join(short)
+        )
+    
+    for product_id, item in lines.items():
+        if product_id not in quantities:
+            cart.items.remove(item)
+        else:
+            item.quantity = quantities[product_id]
+    
+    for product_id, quantity in quantities.items():
+        if product_id not in lines:
+            cart.items.append(CartItem(product_id=product_id, quantity=quantity))
+    
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request created the cart or one of these lines first (unique indexes)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The cart was changed by another request, retry the batch"
+        )
+    
+    return await load_cart(db, current_user.id)
 
 
 @router.put("/items/{product_id}", response_model=CartResponse)
-def update_cart_item(
+async def update_cart_item(
     product_id: int,
     item_data: CartItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
     ):
     """Update quantity of a cart item"""
     
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = await get_user_cart(db, current_user.id)
     if not cart:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cart not found"
         )
     
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).filter(
         CartItem.cart_id == cart.id,
         CartItem.product_id == product_id
-    ).first()
+    ))
     
     if not cart_item:
         raise HTTPException(
@@ -124,8 +247,9 @@ def update_cart_item(
         )
     
     # Check stock availability
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).filter(Product.id == product_id))
     if item_data.quantity > product.stock:
+        stock_rejections.labels("update_cart_item").inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Insufficient stock. Only {product.stock} items available"
@@ -138,31 +262,30 @@ def update_cart_item(
         )
     
     cart_item.quantity = item_data.quantity
-    db.commit()
-    db.refresh(cart)
+    await db.commit()
     
-    return cart
+    return await load_cart(db, current_user.id)
 
 
 @router.delete("/items/{product_id}", response_model=CartResponse)
-def remove_from_cart(
+async def remove_from_cart(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
     ):
     """Remove product from cart"""
     
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = await get_user_cart(db, current_user.id)
     if not cart:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cart not found"
         )
     
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).filter(
         CartItem.cart_id == cart.id,
         CartItem.product_id == product_id
-    ).first()
+    ))
     
     if not cart_item:
         raise HTTPException(
@@ -170,21 +293,20 @@ def remove_from_cart(
             detail="Product not in cart"
         )
     
-    db.delete(cart_item)
-    db.commit()
-    db.refresh(cart)
+    await db.delete(cart_item)
+    await db.commit()
     
-    return cart
+    return await load_cart(db, current_user.id)
 
 
 @router.delete("/clear", status_code=status.HTTP_204_NO_CONTENT)
-def clear_cart(
-    db: Session = Depends(get_db),
+async def clear_cart(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
     ):
     """Clear all items from cart"""
     
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = await get_user_cart(db, current_user.id)
     if not cart:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -192,7 +314,7 @@ def clear_cart(
         )
     
     # Delete all cart items
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    db.commit()
+    await db.execute(delete(CartItem).filter(CartItem.cart_id == cart.id))
+    await db.commit()
     
     return None
\ No newline at end of file
@@ -1,136 +1,328 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, delete, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from typing import List, Literal, Optional
+from datetime import datetime
+from core.database import get_async_db, AsyncSessionLocal
+from core.replica import get_async_read_db
 from schemas.order import OrderResponse, OrderStatusUpdate
 from models.order import Order, OrderItem, OrderStatus
 from models.cart import Cart, CartItem
-from models.product import Product
 from models.user import User, UserRole
-from core.dependencies import get_current_user, require_admin
+from core.dependencies import get_current_user, require_admin, invalidate_principal
+from core.admission import order_admission
+from core.metrics import orders_placed, orders_cancelled, stock_rejections
+from utils.inventory import reserve_stock, find_shortages, restore_stock
+from utils.rollups import record_order, record_status_change
+from utils.pagination import encode_cursor, decode_cursor
+from utils.serialization import dump_orders, dumps
+from utils.fieldsets import Selection, fieldset, load_options, project
+import csv
+import io
+import json
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+
+# Eager-load items and their products so serializing an order never lazy-loads
+ORDER_LOAD_OPTIONS = (
+    selectinload(Order.items).selectinload(OrderItem.product),
+)
+
+
+def order_load_options(selection: Optional[Selection], required=()) -> tuple:
+    """Eager loads for full orders, or only the selected columns for a sparse fieldset"""
+    if selection is None:
+        return ORDER_LOAD_OPTIONS
+    return tuple(load_options(selection, OrderResponse, Order, required=required))
+
+
+async def load_order(db: AsyncSession, order_id: int, selection: Optional[Selection] = None):
+    """Load an order with its items and their products (one query per level)"""
+    return await db.scalar(
+        select(Order).options(*order_load_options(selection, required=["user_id"])).filter(
+            Order.id == order_id
+        ).execution_options(populate_existing=True)
+    )
+
+
+def _dump_selected(orders, selection: Selection) -> bytes:
+    return dumps([project(order, selection, OrderResponse) for order in orders])
+
 
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def place_order(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def place_order(
+    db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     """Place an order from cart items"""
-    # Get user's cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    # Get user's cart with every item's product in one query
+    cart = await db.scalar(select(Cart).filter(Cart.user_id == current_user.id))
+    cart_items = []
+    if cart:
+        result = await db.execute(
+            select(CartItem).options(joinedload(CartItem.product)).filter(
+                CartItem.cart_id == cart.id
+            )
+        )
+        cart_items = result.scalars().all()
     
-    if not cart or not cart.items:
+    if not cart_items:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cart is empty"
         )
     
+    quantities = {item.product_id: item.quantity for item in cart_items}
+    
+    if order_admission.handles(quantities):
+        lines = [(item.id, item.product_id, item.quantity, item.product.price) for item in cart_items]
+        # Give the connection back while the checkout waits for its batch
+        await db.rollback()
+        order_id = await order_admission.submit(current_user.id, lines)
+        return await load_order(db, order_id)
+    
     # Begin transaction
     try:
-        total_amount = 0.0
-        order_items_data = []
-        
-        # Validate all items and calculate total
-        for cart_item in cart.items:
-            product = db.query(Product).filter(Product.id == cart_item.product_id).first()
+        # Validate and deduct stock for all items in one conditional UPDATE
+        if not await db.run_sync(reserve_stock, quantities):
+            await db.rollback()
+            missing, short = await db.run_sync(find_shortages, quantities)
             
-            if not product:
+            if missing:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Product {cart_item.product_id} not found"
+                    detail=f"Product {', '.join(str(product_id) for product_id in missing)} not found"
                 )
             
-            # Check stock availability
-            if product.stock < cart_item.quantity:
+            stock_rejections.labels("place_order").inc()
+            if not short:
+                # Stock was restored between the UPDATE and the re-check
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Insufficient stock for {product.name}. Only {product.stock} items available"
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Stock changed while placing the order, please retry"
                 )
             
-            # Prevent negative inventory
-            if product.stock - cart_item.quantity < 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Cannot order {cart_item.quantity} of {product.name}"
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient stock for " + ", ".join(
+                    f"{product.name} (only {product.stock} items available)" for product in short
                 )
-            
-            item_total = product.price * cart_item.quantity
-            total_amount += item_total
-            
-            order_items_data.append({
-                "product_id": product.id,
-                "quantity": cart_item.quantity,
-                "price": product.price  # Store current price
-            })
+            )
+        
+        total_amount = sum(item.product.price * item.quantity for item in cart_items)
         
-        # Create order
+        # Create order with its items, storing the current price
         new_order = Order(
             user_id=current_user.id,
             total_amount=round(total_amount, 2),
-            status=OrderStatus.PENDING
+            status=OrderStatus.PENDING,
+            items=[
+                OrderItem(
+                    product_id=item.product_id,
+                    quantity=item.quantity,
+                    price=item.product.price
+                )
+                for item in cart_items
+            ]
         )
         db.add(new_order)
-        db.flush()  # Get order ID without committing
-        
-        # Create order items and deduct stock
-        for item_data in order_items_data:
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=item_data["product_id"],
-                quantity=item_data["quantity"],
-                price=item_data["price"]
-            )
-            db.add(order_item)
-            
-            # Deduct stock
-            product = db.query(Product).filter(Product.id == item_data["product_id"]).first()
-            product.stock -= item_data["quantity"]
         
         # Clear cart after successful order
-        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+        await db.execute(delete(CartItem).filter(CartItem.cart_id == cart.id))
+        
+        # Count the order into the sales rollups in the same transaction
+        await db.flush()
+        await db.run_sync(record_order, new_order, 1)
         
         # Commit transaction
-        db.commit()
-        db.refresh(new_order)
+        await db.commit()
+        orders_placed.inc()
         
-        return new_order
+        return await load_order(db, new_order.id)
     
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to place order: {str(e)}"
         )
 
 
+async def order_filters(
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    min_total: Optional[float] = None
+) -> list:
+    """Filter conditions shared by the order listing and the export"""
+    filters = []
+    if order_status is not None:
+        filters.append(Order.status == order_status)
+    if created_from is not None:
+        filters.append(Order.created_at >= created_from)
+    if created_to is not None:
+        filters.append(Order.created_at < created_to)
+    if user_id is not None:
+        filters.append(Order.user_id == user_id)
+    if min_total is not None:
+        filters.append(Order.total_amount >= min_total)
+    return filters
+
+
 @router.get("/", response_model=List[OrderResponse])
-def get_orders(
-    db: Session = Depends(get_db),
+async def get_orders(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    filters: list = Depends(order_filters),
+    selection: Optional[Selection] = Depends(fieldset(OrderResponse)),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's orders (customers see their own, admins see all)"""
+    """
+    Get user's orders (customers see their own, admins see all), newest first
+
+    Results are paged, DEFAULT_PAGE_SIZE orders unless `limit` says otherwise:
+    pass the `X-Next-Cursor` response header back as `cursor` for the next
+    page. Rows are encoded
+    straight to JSON rather than validated through OrderResponse. `?fields=`
+    limits both the response and the columns read to the listed fields.
+    """
+    
+    # The cursor is built from created_at, so it is loaded even when not selected
+    query = select(Order).options(
+        *order_load_options(selection, required=["created_at"])
+    ).filter(*filters)
     
-    if current_user.role == UserRole.ADMIN:
-        # Admin can see all orders
-        orders = db.query(Order).order_by(Order.created_at.desc()).all()
-    else:
+    if current_user.role != UserRole.ADMIN:
         # Customer can only see their orders
-        orders = db.query(Order).filter(
-            Order.user_id == current_user.id
-        ).order_by(Order.created_at.desc()).all()
+        query = query.filter(Order.user_id == current_user.id)
+    
+    if cursor:
+        sort, last_created_at, last_id = decode_cursor(cursor)
+        if sort != "orders":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        # Seek past the last order of the previous page (newest first)
+        query = query.filter(
+            tuple_(Order.created_at, Order.id) < tuple_(last_created_at, last_id)
+        )
+    
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    
+    # Fetch one extra order to know whether another page exists
+    result = await db.execute(query.limit(limit + 1))
+    orders = result.scalars().all()
+    
+    headers = {}
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        headers["X-Next-Cursor"] = encode_cursor("orders", last.created_at, last.id)
+    
+    body = dump_orders(orders) if selection is None else _dump_selected(orders, selection)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+async def export_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    filters: list = Depends(order_filters),
+    current_user: User = Depends(require_admin)
+):
+    """Stream orders as NDJSON (one order per line) or CSV (one item per line) (Admin only)"""
     
-    return orders
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _stream_orders(filters, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'}
+    )
+
+
+async def _stream_orders(filters: list, format: str):
+    """Yield export lines from a server-side cursor, holding one batch in memory at a time"""
+    
+    query = select(
+        Order.id, Order.user_id, Order.status, Order.total_amount, Order.created_at,
+        OrderItem.product_id, OrderItem.quantity, OrderItem.price
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.id).filter(*filters).order_by(
+        Order.id, OrderItem.id
+    ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    # The request's session is closed before the body is streamed, so use our own
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        
+        if format == "csv":
+            yield _csv_line([
+                "order_id", "user_id", "status", "total_amount", "created_at",
+                "product_id", "quantity", "price"
+            ])
+            async for rows in result.partitions():
+                yield "".join(
+                    _csv_line([
+                        row.id, row.user_id, row.status.value, row.total_amount,
+                        row.created_at.isoformat() if row.created_at else "",
+                        row.product_id, row.quantity, row.price
+                    ])
+                    for row in rows
+                )
+            return
+        
+        # Rows arrive ordered by order id, so an order is complete once the id changes
+        order = None
+        async for rows in result.partitions():
+            lines = []
+            for row in rows:
+                if order is None or order["id"] != row.id:
+                    if order is not None:
+                        lines.append(json.dumps(order) + "\n")
+                    order = {
+                        "id": row.id,
+                        "user_id": row.user_id,
+                        "status": row.status.value,
+                        "total_amount": row.total_amount,
+                        "created_at": row.created_at.isoformat() if row.created_at else None,
+                        "items": [],
+                    }
+                if row.product_id is not None:
+                    order["items"].append({
+                        "product_id": row.product_id,
+                        "quantity": row.quantity,
+                        "price": row.price,
+                    })
+            yield "".join(lines)
+        
+        if order is not None:
+            yield json.dumps(order) + "\n"
+
+
+def _csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(
+async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    selection: Optional[Selection] = Depends(fieldset(OrderResponse)),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific order"""
+    """Get a specific order (`?fields=` returns only the listed fields)"""
     
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await load_order(db, order_id, selection)
     
     if not order:
         raise HTTPException(
@@ -145,20 +337,23 @@ def get_order(
             detail="Not authorized to view this order"
         )
     
+    if selection is not None:
+        return Response(dumps(project(order, selection, OrderResponse)), media_type="application/json")
+    
     return order
 
 
 @router.patch("/{order_id}/status", response_model=OrderResponse)
-def update_order_status(
+async def update_order_status(
     order_id: int,
     status_update: OrderStatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
     
     ):
     """Update order status (Admin only)"""
     
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.scalar(select(Order).filter(Order.id == order_id))
     
     if not order:
         raise HTTPException(
@@ -166,22 +361,26 @@ def update_order_status(
             detail="Order not found"
         )
     
+    old_status = order.status
     order.status = status_update.status
-    db.commit()
-    db.refresh(order)
+    # Moving into or out of CANCELLED changes what the sales rollups count
+    await db.run_sync(record_status_change, order, old_status)
+    await db.commit()
     
-    return order
+    return await load_order(db, order.id)
 
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
-def cancel_order(
+async def cancel_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
     ):
     """Cancel an order (restore stock and track cancellations for fraud prevention)"""
     
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.scalar(
+        select(Order).options(selectinload(Order.items)).filter(Order.id == order_id)
+    )
     
     if not order:
         raise HTTPException(
@@ -204,17 +403,18 @@ def cancel_order(
         )
     
     try:
-        # Restore stock
+        # Restore stock for all items in one UPDATE
+        quantities = {}
         for order_item in order.items:
-            product = db.query(Product).filter(Product.id == order_item.product_id).first()
-            if product:
-                product.stock += order_item.quantity
+            quantities[order_item.product_id] = quantities.get(order_item.product_id, 0) + order_item.quantity
+        await db.run_sync(restore_stock, quantities)
         
         # Update order status
         order.status = OrderStatus.CANCELLED
+        await db.run_sync(record_order, order, -1)
         
         # Track cancellations for fraud prevention
-        user = db.query(User).filter(User.id == order.user_id).first()
+        user = await db.scalar(select(User).filter(User.id == order.user_id))
         user.order_cancellation_count += 1
         
         # Fraud prevention: block users with excessive cancellations
@@ -224,12 +424,14 @@ def cancel_order(
                 detail="Account suspended due to excessive order cancellations"
             )
         
-        db.commit()
+        await db.commit()
+        await invalidate_principal(user.email)
+        orders_cancelled.inc()
         
         return None
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to cancel order: {str(e)}"
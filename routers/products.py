@@ -1,18 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from core.database import get_db
+from typing import List, Literal, Optional
+from core.database import get_db, AsyncSessionLocal
+from core.replica import get_async_catalog_db
+from core.config import settings
 from schemas.product import ProductCreate, ProductUpdate, ProductResponse
 from models.product import Product
 from models.user import User
 from core.dependencies import require_admin, get_current_user
+from core.catalog import catalog_cache
+from core.search import fts5_query, search_statement
+from utils.pagination import encode_cursor, decode_cursor
+from utils.images import save_upload, schedule_thumbnails
+from utils.bulk_import import import_products
+from utils.serialization import dump_products, dumps
+from utils.fieldsets import Selection, fieldset, load_options, project
 from fastapi import UploadFile, File, Form
-from PIL import Image
-import secrets
-import os
+from fastapi.responses import StreamingResponse
+import csv
+import io
+import json
 
 router = APIRouter()
 
+# Columns that keyset pagination can seek on (always paired with Product.id)
+SORT_COLUMNS = {
+    "created_at": Product.created_at,
+    "name": Product.name,
+}
+
+# Columns written by the export, readable again by the import
+EXPORT_COLUMNS = ["id", "name", "description", "price", "stock", "image", "created_at", "updated_at"]
+EXPORT_BATCH_SIZE = 1000
+
+MAX_PAGE_SIZE = 1000
+MAX_SEARCH_RESULTS = 100
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product(
     name: str = Form(...),
@@ -36,27 +61,7 @@ def create_product(
     image_name = None
 
     if image:
-        IMAGE_PATH = "./app/static/products/"
-        os.makedirs(IMAGE_PATH, exist_ok=True)
-
-        extension = image.filename.split(".")[-1].lower()
-        if extension not in ["png", "jpg", "jpeg"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Image format not supported"
-            )
-
-        image_name = secrets.token_hex(10) + "." + extension
-        image_path = os.path.join(IMAGE_PATH, image_name)
-
-        contents = image.file.read()
-        with open(image_path, "wb") as f:
-            f.write(contents)
-
-        # Resize to 300x300 pixels
-        img = Image.open(image_path)
-        img = img.resize((300, 300)) 
-        img.save(image_path)
+        image_name = save_upload(image)
 
     new_product = Product(
         name=name,
@@ -69,24 +74,191 @@ def create_product(
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
+    catalog_cache.invalidate()
+
+    if image_name:
+        schedule_thumbnails(image_name)
 
     return new_product
 
 @router.get("/", response_model=List[ProductResponse])
-def get_all_products(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+async def get_all_products(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    sort: Optional[Literal["created_at", "name"]] = None,
+    cursor: Optional[str] = None,
+    selection: Optional[Selection] = Depends(fieldset(ProductResponse)),
+    db: AsyncSession = Depends(get_async_catalog_db)
+    ):
+    """
+    Get all products (Public endpoint)
+
+    Passing `sort` or `cursor` switches to keyset pagination: the cursor for
+    the next page is returned in the `X-Next-Cursor` response header.
+    Responses carry an ETag and are served from the catalog cache.
+    `?fields=name,price` returns (and reads) only the listed fields.
+    """
+    version = await catalog_cache.current_version()
+    cache_key = ("list", skip, limit, sort, cursor, request.query_params.get("fields"))
+    cached = await catalog_cache.response(request, version, cache_key)
+    if cached is not None:
+        return cached
+
+    if sort is None and cursor is None:
+        # Offset pagination, kept for older clients
+        query = _select_products(selection).offset(skip).limit(limit)
+        result = await db.execute(query)
+        products = result.scalars().all()
+        return await catalog_cache.store(request, version, cache_key, _dump_selected(products, selection))
+
+    filters = []
+    if cursor:
+        sort, last_value, last_id = decode_cursor(cursor)
+        if sort not in SORT_COLUMNS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        # Seek past the last row of the previous page instead of counting rows
+        filters.append(tuple_(SORT_COLUMNS[sort], Product.id) > tuple_(last_value, last_id))
+
+    # The cursor is built from the sort column, so it is loaded even when not selected
+    query = _select_products(selection, required=[sort]).filter(*filters)
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(query.order_by(SORT_COLUMNS[sort], Product.id).limit(limit + 1))
+    products = result.scalars().all()
+
+    headers = {}
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        headers["X-Next-Cursor"] = encode_cursor(sort, getattr(last, sort), last.id)
+
+    return await catalog_cache.store(request, version, cache_key, _dump_selected(products, selection), headers)
+
+
+def _select_products(selection: Optional[Selection], required=()):
+    """SELECT of products reading only the columns a sparse fieldset needs"""
+    query = select(Product)
+    if selection is not None:
+        query = query.options(*load_options(selection, ProductResponse, Product, required=required))
+    return query
+
+
+def _dump_selected(products, selection: Optional[Selection]) -> bytes:
+    if selection is None:
+        return dump_products(products)
+    return dumps([project(product, selection, ProductResponse) for product in products])
+
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncSession = Depends(get_async_catalog_db)
     ):
-    """Get all products (Public endpoint)"""
-    products = db.query(Product).offset(skip).limit(limit).all()
-    return products
+    """Full-text search over product name and description, best matches first (Public)"""
+    version = await catalog_cache.current_version()
+    cache_key = ("search", q, skip, limit)
+    cached = await catalog_cache.response(request, version, cache_key)
+    if cached is not None:
+        return cached
+
+    products = []
+    dialect = db.bind.dialect.name
+    # Nothing searchable (e.g. only punctuation) cannot match anything
+    if dialect != "sqlite" or fts5_query(q):
+        result = await db.execute(search_statement(dialect, q, skip, limit))
+        products = result.scalars().all()
+
+    return await catalog_cache.store(request, version, cache_key, dump_products(products))
+
+
+@router.post("/import")
+def bulk_import_products(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+    ):
+    """
+    Upsert products by name from a CSV or NDJSON file (Admin only)
+
+    Rows are committed in batches; invalid rows are reported and skipped
+    without aborting the rest of the import.
+    """
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+
+    report = import_products(db, file.file, format, settings.BULK_IMPORT_BATCH_SIZE)
+    catalog_cache.invalidate()
+
+    return report
+
+
+@router.get("/export")
+async def export_products(
+    format: Literal["csv", "ndjson"] = "ndjson",
+    current_user: User = Depends(require_admin)
+    ):
+    """Stream the whole catalog as CSV or NDJSON (Admin only)"""
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _stream_products(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
+
+
+async def _stream_products(format: str):
+    """Yield export lines from a server-side cursor, one batch at a time"""
+    columns = [getattr(Product, column) for column in EXPORT_COLUMNS]
+    query = select(*columns).order_by(Product.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    # The request's session is closed before the body is streamed, so use our own
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            async for rows in result.partitions():
+                writer.writerows(
+                    [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+                    for row in rows
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+            return
+
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps(dict(row._mapping), default=lambda value: value.isoformat()) + "\n"
+                for row in rows
+            )
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    request: Request,
+    selection: Optional[Selection] = Depends(fieldset(ProductResponse)),
+    db: AsyncSession = Depends(get_async_catalog_db)
+    ):
     """Get a single product by ID (Public)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    version = await catalog_cache.current_version()
+    cache_key = ("product", product_id, request.query_params.get("fields"))
+    cached = await catalog_cache.response(request, version, cache_key)
+    if cached is not None:
+        return cached
+    
+    product = await db.scalar(_select_products(selection).filter(Product.id == product_id))
     
     if not product:
         raise HTTPException(
@@ -94,7 +266,11 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
             detail="product not found"
         )
     
-    return product
+    if selection is not None:
+        body = dumps(project(product, selection, ProductResponse))
+    else:
+        body = ProductResponse.model_validate(product).model_dump_json().encode("utf-8")
+    return await catalog_cache.store(request, version, cache_key, body)
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -120,6 +296,7 @@ def update_product(
     
     db.commit()
     db.refresh(product)
+    catalog_cache.invalidate()
     
     
     return product
@@ -136,6 +313,7 @@ def delete_product(
     if product:
         db.delete(product)
         db.commit()
+        catalog_cache.invalidate()
 
 
         raise HTTPException(
@@ -180,5 +358,6 @@ def update_product_stock(
     product.stock = stock
     db.commit()
     db.refresh(product)
+    catalog_cache.invalidate()
     
     return product
\ No newline at end of file
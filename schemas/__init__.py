@@ -1,11 +1,14 @@
 from schemas.user import UserCreate, UserLogin, UserResponse, Token
 from schemas.product import ProductCreate, ProductUpdate, ProductResponse
-from schemas.cart import CartResponse, CartItemCreate, CartItemUpdate, CartItemResponse
+from schemas.cart import CartResponse, CartItemCreate, CartItemUpdate, CartItemResponse, CartOperation, CartBatchRequest
 from schemas.order import OrderResponse, OrderItemResponse, OrderStatusUpdate
+from schemas.analytics import DailySalesResponse, ProductSalesResponse
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "Token",
     "ProductCreate", "ProductUpdate", "ProductResponse",
     "CartResponse", "CartItemCreate", "CartItemUpdate", "CartItemResponse",
-    "OrderResponse", "OrderItemResponse", "OrderStatusUpdate"
+    "CartOperation", "CartBatchRequest",
+    "OrderResponse", "OrderItemResponse", "OrderStatusUpdate",
+    "DailySalesResponse", "ProductSalesResponse"
     ]
\ No newline at end of file
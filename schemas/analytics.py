@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+
+class DailySalesResponse(BaseModel):
+    day: date
+    orders: int
+    units: int
+    revenue: float
+
+
+class ProductSalesResponse(BaseModel):
+    product_id: int
+    name: Optional[str] = None  # None once the product has been deleted
+    units: int
+    revenue: float
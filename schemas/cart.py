@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 from schemas.product import ProductResponse
 
@@ -13,6 +13,22 @@ class CartItemUpdate(BaseModel):
     quantity: int = Field(..., gt=0)
 
 
+class CartOperation(BaseModel):
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    quantity: Optional[int] = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.op != "remove" and self.quantity is None:
+            raise ValueError(f"quantity is required for '{self.op}'")
+        return self
+
+
+class CartBatchRequest(BaseModel):
+    operations: List[CartOperation] = Field(..., min_length=1, max_length=500)
+
+
 class CartItemResponse(BaseModel):
     id: int
     product_id: int
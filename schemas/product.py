@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, computed_field
-from typing import Optional
+from typing import ClassVar, Dict, Optional, Tuple
 from datetime import datetime
+from utils.images import IMAGE_URL, thumbnail_sizes, variant_name
 
 class ProductCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=200)
@@ -24,11 +25,32 @@ class ProductResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+    # Columns each computed field reads, loaded even when only it is selected
+    COMPUTED_FIELD_SOURCES: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        "image_url": ("image",),
+        "image_variants": ("image",),
+    }
+
     @computed_field
     @property
     def image_url(self) -> Optional[str]:
         if self.image:
-            return f"http://localhost:8000/static/products/{self.image}"
+            return f"{IMAGE_URL}{self.image}"
         return None
+
+    @computed_field
+    @property
+    def image_variants(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """Thumbnail URLs by size, then format (generated shortly after upload)"""
+        if not self.image:
+            return None
+        extension = self.image.rsplit(".", 1)[-1]
+        return {
+            str(size): {
+                fmt: f"{IMAGE_URL}{variant_name(self.image, size, fmt)}"
+                for fmt in (extension, "webp")
+            }
+            for size in thumbnail_sizes()
+        }
     class Config:
         from_attributes = True
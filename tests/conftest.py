@@ -0,0 +1,83 @@
+"""
+Shared fixtures: the app on a throwaway SQLite file, emptied between tests.
+
+Project modules read their settings at import time, so the environment is
+set up here before anything from the app is imported.
+"""
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="mini-ecommerce-tests-"), "test.db")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+os.environ["SECRET_KEY"] = "test-secret-key-that-is-long-enough-for-hs256"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ.setdefault("CACHE_BACKEND", "memory")
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+PASSWORD = "testpass"
+
+
+@pytest.fixture
+def app():
+    import main
+    return main.app
+
+
+@pytest.fixture
+def client(app):
+    from core.catalog import catalog_cache
+    from core.database import engine
+    from core.dependencies import principal_cache
+    from core.idempotency import idempotency_store
+    from models import Base
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+    # Children first; the FTS triggers keep the search index in step
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    catalog_cache.invalidate()
+    principal_cache.clear()
+    idempotency_store._responses.clear()
+
+
+def register(client, name: str, role: str = "customer") -> dict:
+    """Create a user and return Authorization headers for them"""
+    email = f"{name}@example.com"
+    response = client.post("/api/auth/register", json={
+        "email": email, "username": name, "password": PASSWORD, "role": role
+    })
+    assert response.status_code == 201, response.text
+    response = client.post("/api/auth/login/json", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def admin(client) -> dict:
+    return register(client, "admin", role="admin")
+
+
+@pytest.fixture
+def customer(client) -> dict:
+    return register(client, "customer")
+
+
+@pytest.fixture
+def make_product(client, admin):
+    def make(name: str = "Widget", price: float = 9.5, stock: int = 10, description: str = "A widget") -> dict:
+        response = client.post("/api/products/", data={
+            "name": name, "description": description, "price": price, "stock": stock
+        }, headers=admin)
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make
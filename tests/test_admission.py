@@ -0,0 +1,66 @@
+"""The order admission writer is drained and stopped on shutdown"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core.admission import OrderAdmissionQueue
+
+
+def _queue(process) -> OrderAdmissionQueue:
+    admission = OrderAdmissionQueue(enabled=True, hot_products=[], batch_size=2, max_wait=0.01, maxsize=10)
+
+    async def answer(batch):
+        await process()
+        for checkout in batch:
+            checkout.future.set_result(checkout.user_id)
+
+    admission._process = answer
+    return admission
+
+
+def test_stop_finishes_queued_checkouts():
+    async def main():
+        admission = _queue(lambda: asyncio.sleep(0.02))
+        checkouts = [asyncio.ensure_future(admission.submit(user_id, [])) for user_id in range(5)]
+        await asyncio.sleep(0)
+
+        await admission.stop()
+        assert admission._writer is None
+        assert await asyncio.gather(*checkouts) == list(range(5))
+
+        # Nothing is taken while stopped, a new submit starts a new writer
+        assert await admission.submit(7, []) == 7
+        await admission.stop()
+
+    asyncio.run(main())
+
+
+def test_stop_fails_what_it_cannot_drain():
+    async def main():
+        admission = _queue(lambda: asyncio.sleep(60))
+        checkouts = [asyncio.ensure_future(admission.submit(user_id, [])) for user_id in range(3)]
+        await asyncio.sleep(0.05)
+
+        await admission.stop(timeout=0.05)
+        for checkout in checkouts:
+            with pytest.raises(HTTPException) as error:
+                await checkout
+            assert error.value.status_code == 503
+
+    asyncio.run(main())
+
+
+def test_app_shutdown_stops_the_writer(client, customer, make_product, monkeypatch):
+    from core.admission import order_admission
+
+    monkeypatch.setattr(order_admission, "enabled", True)
+    monkeypatch.setattr(order_admission, "hot_products", set())
+    product = make_product()
+    client.post("/api/cart/items", json={"product_id": product["id"], "quantity": 1}, headers=customer)
+    assert client.post("/api/orders/", headers=customer).status_code == 201
+
+    writer = order_admission._writer
+    client.__exit__(None, None, None)
+    assert writer.done() and order_admission._writer is None
+    client.__enter__()
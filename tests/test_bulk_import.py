@@ -0,0 +1,71 @@
+"""Bulk product import: partial updates, undecodable files and per-row database errors"""
+import json
+
+import pytest
+
+
+def _import(client, admin, content: bytes, filename: str = "products.ndjson"):
+    response = client.post("/api/products/import", files={"file": (filename, content)}, headers=admin)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _ndjson(*rows) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+
+def test_update_keeps_fields_missing_from_the_row(client, admin, make_product):
+    product = make_product(name="Lamp", description="Warm light", price=20, stock=3)
+
+    report = _import(client, admin, _ndjson(
+        {"name": "Lamp", "price": 25, "stock": 4},
+        {"name": "Desk", "price": 90, "stock": 1},
+        {"name": "Chair", "description": "Oak", "price": 40, "stock": 2},
+    ))
+    assert (report["inserted"], report["updated"], report["failed"]) == (2, 1, 0)
+
+    updated = client.get(f"/api/products/{product['id']}").json()
+    assert (updated["description"], updated["price"], updated["stock"]) == ("Warm light", 25, 4)
+
+
+def test_invalid_utf8_is_reported_not_raised(client, admin):
+    bad_line = b'{"name": "Caf\xe9", "price": 1, "stock": 1}\n'
+    content = _ndjson({"name": "Before", "price": 1, "stock": 1}) + bad_line + _ndjson({"name": "After", "price": 1, "stock": 1})
+
+    report = _import(client, admin, content)
+    assert (report["inserted"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["row"] == 2 and "UTF-8" in report["errors"][0]["error"]
+
+    report = _import(client, admin, b"name,price,stock\nTea,2,5\nCaf\xe9,1,1\nMate,3,1\n", filename="products.csv")
+    assert (report["inserted"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["row"] == 3 and "UTF-8" in report["errors"][0]["error"]
+
+
+@pytest.fixture
+def refuse_name():
+    """A database-level rule that rejects one product name, as a constraint would"""
+    from sqlalchemy import text
+    from core.database import engine
+
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TRIGGER refuse_bad BEFORE INSERT ON products WHEN NEW.name = 'Bad' "
+            "BEGIN SELECT RAISE(ABORT, 'refused'); END"
+        ))
+    yield "Bad"
+    with engine.begin() as connection:
+        connection.execute(text("DROP TRIGGER refuse_bad"))
+
+
+def test_database_error_fails_only_its_row(client, admin, make_product, refuse_name):
+    product = make_product(name="Lamp", stock=1)
+
+    report = _import(client, admin, _ndjson(
+        {"name": "Good", "price": 1, "stock": 1},
+        {"name": refuse_name, "price": 1, "stock": 1},
+        {"name": "Lamp", "price": 2, "stock": 7},
+    ))
+    assert (report["inserted"], report["updated"], report["failed"]) == (1, 1, 1)
+    assert report["errors"][0]["row"] == 2
+    assert client.get(f"/api/products/{product['id']}").json()["stock"] == 7
+    assert [found["name"] for found in client.get("/api/products/search?q=Good").json()] == ["Good"]
@@ -0,0 +1,96 @@
+"""Cache backends: atomic add, SQLite calls kept off the event loop, JSON values in a private file"""
+import asyncio
+import os
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.cache import SQLiteCache, TTLCache, default_cache_path
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return TTLCache(maxsize=100, ttl=60)
+    return SQLiteCache(str(tmp_path / "cache.db"), "tests", maxsize=100, ttl=60)
+
+
+def test_add_claims_a_key_once(cache):
+    barrier = threading.Barrier(16)
+
+    def claim(index):
+        barrier.wait()
+        return cache.add("claim", index)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(claim, range(16)))
+    assert results.count(True) == 1
+    assert cache.get("claim") == results.index(True)
+
+
+def test_awaitable_methods_only_leave_the_loop_for_sqlite(cache):
+    threads = []
+    get = cache.get
+
+    def recording_get(key):
+        threads.append(threading.current_thread())
+        return get(key)
+
+    cache.get = recording_get
+
+    async def main():
+        await cache.aset("key", "value")
+        assert await cache.aget("key") == "value"
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(main())
+    assert (threads[0] is not loop_thread) == isinstance(cache, SQLiteCache)
+
+
+def test_values_round_trip_as_json(cache):
+    value = {"body": b"\x00\xffbytes", "headers": {"X-Total-Count": "3"}, "pairs": [[b"a", b"b"]], "n": 1.5}
+    cache.set("key", value)
+    assert cache.get("key") == value
+
+
+def test_objects_are_refused(cache):
+    if isinstance(cache, TTLCache):
+        pytest.skip("the memory backend keeps values as they are")
+    with pytest.raises(TypeError):
+        cache.set("key", object())
+
+
+def test_sqlite_file_is_private(tmp_path):
+    path = tmp_path / "cache.db"
+    SQLiteCache(str(path), "tests", maxsize=10, ttl=60).set("key", "value")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    shared = tmp_path / "shared.db"
+    shared.touch(mode=0o666)
+    os.chmod(shared, 0o666)
+    with pytest.raises(PermissionError):
+        SQLiteCache(str(shared), "tests", maxsize=10, ttl=60)
+
+
+def test_default_path_is_in_a_private_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    directory = os.path.dirname(default_cache_path())
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        default_cache_path()
+
+
+def test_principal_cache_holds_no_password_hash(client, customer):
+    from core.dependencies import principal_cache
+
+    me = client.get("/api/auth/me", headers=customer).json()
+    cached = principal_cache.get(me["email"])
+    assert "hashed_password" not in cached and cached["id"] == me["id"]
+    # Served from the cached fields
+    assert client.get("/api/auth/me", headers=customer).json() == me
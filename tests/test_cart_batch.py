@@ -0,0 +1,52 @@
+"""Cart batch updates: stock checks on increases only, 409 on a racing write"""
+from sqlalchemy import event
+
+
+def _batch(client, headers, *operations):
+    return client.post("/api/cart/batch", json={"operations": list(operations)}, headers=headers)
+
+
+def test_batch_ignores_stock_drops_on_lines_it_does_not_raise(client, admin, customer, make_product):
+    kept, added = make_product(name="Kept", stock=5), make_product(name="Added", stock=5)
+    assert client.post("/api/cart/items", json={"product_id": kept["id"], "quantity": 4}, headers=customer).status_code == 201
+    assert client.patch(f"/api/products/{kept['id']}/stock", params={"stock": 1}, headers=admin).status_code == 200
+
+    # Untouched and lowered lines over the new stock do not block the batch
+    response = _batch(client, customer, {"op": "add", "product_id": added["id"], "quantity": 1})
+    assert response.status_code == 200, response.text
+    response = _batch(client, customer, {"op": "set", "product_id": kept["id"], "quantity": 3})
+    assert response.status_code == 200, response.text
+
+    # Raising it still does
+    response = _batch(client, customer, {"op": "add", "product_id": kept["id"], "quantity": 1})
+    assert response.status_code == 400
+
+
+def test_batch_racing_another_write_gets_409(client, customer, make_product):
+    from core.database import SessionLocal, async_engine
+    from models.cart import CartItem
+
+    product = make_product()
+    cart_id = client.get("/api/cart/", headers=customer).json()["id"]
+
+    raced = []
+
+    def insert_first(conn, cursor, statement, parameters, context, executemany):
+        # Another request adds the same line just before this batch inserts it
+        if statement.startswith("INSERT INTO cart_items") and not raced:
+            raced.append(statement)
+            with SessionLocal() as db:
+                db.add(CartItem(cart_id=cart_id, product_id=product["id"], quantity=1))
+                db.commit()
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", insert_first)
+    try:
+        response = _batch(client, customer, {"op": "add", "product_id": product["id"], "quantity": 2})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", insert_first)
+
+    assert response.status_code == 409
+    # The retry sees the other request's line and adds to it
+    response = _batch(client, customer, {"op": "add", "product_id": product["id"], "quantity": 2})
+    assert response.status_code == 200
+    assert [item["quantity"] for item in response.json()["items"]] == [3]
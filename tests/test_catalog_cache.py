@@ -0,0 +1,43 @@
+"""Only admin product writes invalidate the catalog cache; ETags follow the body served"""
+
+
+def test_orders_keep_the_catalog_cached(client, admin, customer, make_product):
+    from core.catalog import catalog_cache
+
+    product = make_product(stock=5)
+    etag = client.get(f"/api/products/{product['id']}").headers["ETag"]
+
+    client.post("/api/cart/items", json={"product_id": product["id"], "quantity": 1}, headers=customer)
+    assert client.post("/api/orders/", headers=customer).status_code == 201
+    response = client.get(f"/api/products/{product['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # Once the cached body expires, the new stock comes with a new ETag
+    catalog_cache._entries.clear()
+    response = client.get(f"/api/products/{product['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()["stock"] == 4
+    assert response.headers["ETag"] != etag
+    etag = response.headers["ETag"]
+
+    assert client.patch(f"/api/products/{product['id']}/stock", params={"stock": 9}, headers=admin).status_code == 200
+    response = client.get(f"/api/products/{product['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()["stock"] == 9
+
+
+def test_if_none_match_star_needs_an_existing_product(client, make_product):
+    product = make_product()
+    star = {"If-None-Match": "*"}
+
+    assert client.get("/api/products/999999", headers=star).status_code == 404
+    # Uncached, then cached
+    assert client.get(f"/api/products/{product['id']}", headers=star).status_code == 304
+    assert client.get(f"/api/products/{product['id']}", headers=star).status_code == 304
+
+
+def test_rebuilt_unchanged_body_keeps_its_etag(client, make_product):
+    from core.catalog import catalog_cache
+
+    product = make_product()
+    etag = client.get(f"/api/products/{product['id']}").headers["ETag"]
+    catalog_cache._entries.clear()
+    assert client.get(f"/api/products/{product['id']}", headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,40 @@
+"""Parallel checkouts of a scarce product never oversell it"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import register
+
+BUYERS = 30
+STOCK = 5
+
+
+@pytest.fixture(params=["direct", "queued"])
+def checkout_path(request, monkeypatch):
+    from core.admission import order_admission
+
+    # The queue is off by default; an empty product list queues every checkout
+    monkeypatch.setattr(order_admission, "enabled", request.param == "queued")
+    monkeypatch.setattr(order_admission, "hot_products", set())
+    return request.param
+
+
+def test_parallel_checkouts_sell_each_unit_once(client, make_product, checkout_path):
+    product = make_product(stock=STOCK)
+    buyers = [register(client, f"buyer{index}") for index in range(BUYERS)]
+    for headers in buyers:
+        response = client.post("/api/cart/items", json={"product_id": product["id"], "quantity": 1}, headers=headers)
+        assert response.status_code == 201
+
+    with ThreadPoolExecutor(max_workers=BUYERS) as pool:
+        responses = list(pool.map(lambda headers: client.post("/api/orders/", headers=headers), buyers))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses.count(201) == STOCK, statuses
+    assert statuses.count(400) == BUYERS - STOCK, statuses
+    assert client.get(f"/api/products/{product['id']}").json()["stock"] == 0
+
+    # Winners' carts are emptied, losers keep theirs
+    for headers, response in zip(buyers, responses):
+        items = client.get("/api/cart/", headers=headers).json()["items"]
+        assert len(items) == (0 if response.status_code == 201 else 1)
@@ -0,0 +1,47 @@
+"""Idempotency-Key replays final answers and lets retryable ones run again"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def flaky(customer):
+    """An app whose write answers each status in `statuses` in turn, then 201"""
+    from core.idempotency import IdempotencyMiddleware, IdempotencyStore
+
+    app = FastAPI()
+    calls = []
+    statuses = []
+
+    @app.post("/write")
+    def write():
+        calls.append(1)
+        status_code = statuses.pop(0) if statuses else 201
+        return JSONResponse({"call": len(calls)}, status_code=status_code)
+
+    app.add_middleware(IdempotencyMiddleware, routes=[("POST", "/write")], store=IdempotencyStore(100, 60))
+    with TestClient(app) as client:
+        yield client, calls, statuses, {**customer, "Idempotency-Key": "retry-me"}
+
+
+@pytest.mark.parametrize("status_code", [409, 429, 500, 503])
+def test_retryable_answer_is_not_replayed(flaky, status_code):
+    client, calls, statuses, headers = flaky
+    statuses.append(status_code)
+
+    assert client.post("/write", headers=headers).status_code == status_code
+    retry = client.post("/write", headers=headers)
+    assert retry.status_code == 201 and "Idempotent-Replayed" not in retry.headers
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("status_code", [201, 400, 404])
+def test_final_answer_is_replayed(flaky, status_code):
+    client, calls, statuses, headers = flaky
+    statuses.append(status_code)
+
+    assert client.post("/write", headers=headers).status_code == status_code
+    retry = client.post("/write", headers=headers)
+    assert retry.status_code == status_code and retry.headers["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1
@@ -0,0 +1,77 @@
+import base64
+import json
+
+import pytest
+
+
+def forged(sort, value, last_id) -> str:
+    raw = json.dumps({"s": sort, "v": value, "id": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    forged("created_at", 5, 1),
+    forged("created_at", "yesterday", 1),
+    forged("name", ["a", "b"], 1),
+    forged("name", "Widget", "1"),
+    forged("name", "Widget", True),
+    forged("price", "1", 1),
+])
+def test_forged_product_cursor_is_rejected(client, make_product, cursor):
+    make_product()
+    response = client.get("/api/products/", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_forged_order_cursor_is_rejected(client, customer):
+    response = client.get("/api/orders/", params={"cursor": forged("orders", 5, 1)}, headers=customer)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("sort", ["name", "created_at"])
+def test_keyset_pages_cover_every_product_once(client, make_product, sort):
+    created = {make_product(name=f"Product {index:02d}")["id"] for index in range(7)}
+
+    seen = []
+    response = client.get("/api/products/", params={"sort": sort, "limit": 3})
+    while True:
+        assert response.status_code == 200
+        seen.extend(product["id"] for product in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get("/api/products/", params={"cursor": cursor, "limit": 3})
+
+    assert sorted(seen) == sorted(created)
+
+
+
+def test_orders_are_paged_without_a_limit(client, customer):
+    from core.database import SessionLocal
+    from models.order import Order
+    from routers.orders import DEFAULT_PAGE_SIZE
+
+    user_id = client.get("/api/auth/me", headers=customer).json()["id"]
+    with SessionLocal() as db:
+        db.add_all(Order(user_id=user_id, total_amount=1.0) for _ in range(DEFAULT_PAGE_SIZE + 1))
+        db.commit()
+
+    response = client.get("/api/orders/", headers=customer)
+    assert len(response.json()) == DEFAULT_PAGE_SIZE
+    next_page = client.get("/api/orders/", params={"cursor": response.headers["X-Next-Cursor"]}, headers=customer)
+    assert len(next_page.json()) == 1
+
+
+@pytest.mark.parametrize("params", [
+    {"limit": 0},
+    {"limit": -1},
+    {"limit": 100_000},
+    {"sort": "name", "limit": 0},
+    {"sort": "name", "limit": -5},
+    {"skip": -1},
+])
+def test_out_of_range_page_is_rejected(client, make_product, params):
+    make_product()
+    assert client.get("/api/products/", params=params).status_code == 422
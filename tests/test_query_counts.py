@@ -0,0 +1,92 @@
+"""
+The cart and order reads that used to lazy-load per row run the same number
+of statements whatever the number of rows, under a small ceiling.
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+MANY = 6
+
+
+@contextmanager
+def count_statements():
+    from core.database import async_engine, engine
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = [engine, async_engine.sync_engine]
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def shopper(client, make_product):
+    """Build a customer with `size` cart lines and `size` orders of `size` lines each"""
+    from conftest import register
+
+    def build(name: str, size: int) -> dict:
+        headers = register(client, name)
+        products = [make_product(name=f"{name} product {index}") for index in range(size + 1)]
+        # Warm the principal cache so it is not counted
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+        for _ in range(size):
+            for product in products[:size]:
+                client.post("/api/cart/items", json={"product_id": product["id"], "quantity": 1}, headers=headers)
+            assert client.post("/api/orders/", headers=headers).status_code == 201
+        for product in products[:size]:
+            client.post("/api/cart/items", json={"product_id": product["id"], "quantity": 1}, headers=headers)
+        return {"headers": headers, "spare": products[size]}
+
+    return build
+
+
+def _measure(shopper, prepare) -> list:
+    """
+    Statement counts of a request for a shopper with one row and with MANY.
+    `prepare(shopper)` does any setup and returns the request to count.
+    """
+    counts = []
+    for name, size in (("single", 1), ("many", MANY)):
+        send = prepare(shopper(name, size))
+        with count_statements() as statements:
+            response = send()
+        assert response.status_code in (200, 201), response.text
+        counts.append(len(statements))
+    return counts
+
+
+def test_get_cart(client, shopper):
+    one, many = _measure(shopper, lambda data: lambda: client.get("/api/cart/", headers=data["headers"]))
+    assert one == many <= 3
+
+
+def test_add_to_cart(client, shopper):
+    one, many = _measure(shopper, lambda data: lambda: client.post("/api/cart/items", json={
+        "product_id": data["spare"]["id"], "quantity": 1
+    }, headers=data["headers"]))
+    assert one == many <= 8
+
+
+def test_get_order(client, shopper):
+    def prepare(data):
+        order_id = client.get("/api/orders/", headers=data["headers"]).json()[0]["id"]
+        return lambda: client.get(f"/api/orders/{order_id}", headers=data["headers"])
+
+    one, many = _measure(shopper, prepare)
+    assert one == many <= 3
+
+
+def test_get_orders(client, shopper):
+    one, many = _measure(shopper, lambda data: lambda: client.get("/api/orders/", headers=data["headers"]))
+    assert one == many <= 3
@@ -0,0 +1,60 @@
+"""The hot queries are answered from their indexes rather than by scanning a table"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text, tuple_
+
+from core.search import SQLITE_SEARCH_QUERY
+
+
+def _hot_queries():
+    from sqlalchemy import select
+    from models.cart import CartItem
+    from models.order import Order, OrderItem
+    from models.product import Product
+
+    now = datetime(2026, 1, 1)
+    return {
+        # Product keyset page (sort=created_at, with a cursor)
+        "ix_products_created_at_id": select(Product)
+        .filter(tuple_(Product.created_at, Product.id) > tuple_(now, 1))
+        .order_by(Product.created_at, Product.id).limit(101),
+        # Admin order listing, newest first
+        "ix_orders_created_at_id": select(Order)
+        .order_by(Order.created_at.desc(), Order.id.desc()).limit(51),
+        # A customer's order history, newest first
+        "ix_orders_user_id_created_at": select(Order).filter(Order.user_id == 1)
+        .order_by(Order.created_at.desc(), Order.id.desc()).limit(51),
+        # Items of the listed orders (selectinload)
+        "ix_order_items_order_id": select(OrderItem).filter(OrderItem.order_id.in_([1, 2, 3])),
+        # A cart line by product, and the whole cart (selectinload)
+        "uq_cart_items_cart_product": select(CartItem).filter(CartItem.cart_id == 1, CartItem.product_id == 2),
+    }
+
+
+def _plan(connection, statement) -> str:
+    compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("index", list(_hot_queries()))
+def test_hot_query_uses_its_index(client, index):
+    from core.database import engine
+
+    with engine.connect() as connection:
+        plan = _plan(connection, _hot_queries()[index])
+    assert f"INDEX {index}" in plan, plan
+    assert "USE TEMP B-TREE" not in plan, plan
+
+
+def test_search_uses_the_fts_index(client):
+    from core.database import engine
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(f"EXPLAIN QUERY PLAN {SQLITE_SEARCH_QUERY}"), {"query": "widget", "limit": 20, "skip": 0}
+        ).all()
+    plan = "\n".join(row[-1] for row in rows)
+    assert "VIRTUAL TABLE INDEX" in plan and "products_fts" in plan, plan
+    assert "SCAN products" not in plan.replace("SCAN products_fts", ""), plan
@@ -0,0 +1,99 @@
+"""
+Reads go to READ_DATABASE_URL, except for a user's own reads right after a write.
+
+Settings are read at import time, so the routing tests run in a fresh
+interpreter with READ_DATABASE_URL pointing at a second SQLite file.
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy.engine import make_url
+
+REPLICA = bool(os.environ.get("READ_DATABASE_URL"))
+needs_replica = pytest.mark.skipif(not REPLICA, reason="run by test_routing_with_a_replica")
+
+
+def test_routing_with_a_replica(tmp_path):
+    if REPLICA:
+        pytest.skip("already running against a replica")
+    env = {**os.environ, "READ_DATABASE_URL": f"sqlite:///{tmp_path / 'replica.db'}"}
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "no:warnings", __file__],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "2 passed" in result.stdout
+
+
+def _path(url: str) -> str:
+    return make_url(url).database
+
+
+@pytest.fixture
+def replica(client):
+    """`replica()` copies the primary into the replica, standing in for replication catching up"""
+    from core.config import settings
+    from core.replica import recent_writes
+
+    def replicate():
+        source, target = sqlite3.connect(_path(settings.DATABASE_URL)), sqlite3.connect(_path(settings.READ_DATABASE_URL))
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    replicate()
+    yield replicate
+    recent_writes.clear()
+
+
+@needs_replica
+def test_reads_are_served_by_the_replica(client, admin, make_product, replica):
+    from core.catalog import catalog_cache
+    from core.config import settings
+    from core.replica import recent_writes
+
+    product = make_product(name="Original")
+    replica()
+    # Changed on the primary only, after replication
+    primary = sqlite3.connect(_path(settings.DATABASE_URL))
+    with primary:
+        primary.execute("UPDATE products SET name = 'Renamed' WHERE id = ?", (product["id"],))
+    primary.close()
+    catalog_cache._entries.clear()
+
+    # Within the window of the admin's create, product reads stay on the primary
+    assert client.get(f"/api/products/{product['id']}").json()["name"] == "Renamed"
+
+    recent_writes.clear()
+    catalog_cache._entries.clear()
+    assert client.get(f"/api/products/{product['id']}").json()["name"] == "Original"
+
+
+@needs_replica
+def test_writer_reads_its_writes_from_the_primary(client, admin, customer, make_product, replica):
+    from core.replica import recent_writes
+
+    product = make_product()
+    replica()
+    recent_writes.clear()
+
+    client.post("/api/cart/items", json={"product_id": product["id"], "quantity": 1}, headers=customer)
+    order = client.post("/api/orders/", headers=customer)
+    assert order.status_code == 201
+    order_url = f"/api/orders/{order.json()['id']}"
+
+    # The customer who wrote is pinned to the primary; the admin still reads the lagging replica
+    assert client.get(order_url, headers=customer).status_code == 200
+    assert client.get("/api/orders/", headers=admin).json() == []
+
+    # Past the read-your-writes window the customer is back on the replica
+    recent_writes.clear()
+    assert client.get(order_url, headers=customer).status_code == 404
+    replica()
+    assert client.get(order_url, headers=customer).status_code == 200
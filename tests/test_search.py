@@ -0,0 +1,14 @@
+"""Product search pages are bounded"""
+import pytest
+
+
+def test_search_finds_by_description(client, make_product):
+    make_product(name="Kettle", description="Boils water fast")
+    make_product(name="Toaster", description="Browns bread")
+    assert [product["name"] for product in client.get("/api/products/search?q=water").json()] == ["Kettle"]
+
+
+@pytest.mark.parametrize("params", [{"limit": -1}, {"limit": 0}, {"limit": 101}, {"skip": -1}])
+def test_out_of_range_search_page_is_rejected(client, make_product, params):
+    make_product()
+    assert client.get("/api/products/search", params={"q": "widget", **params}).status_code == 422
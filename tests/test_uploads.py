@@ -0,0 +1,60 @@
+"""Product image uploads are checked before a product can point at them"""
+import io
+import os
+
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def image_dir(tmp_path, monkeypatch):
+    """Uploads go to a temp directory, with thumbnails built inline instead of in the background"""
+    import routers.products
+    from utils import images
+
+    monkeypatch.setattr(images, "IMAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(routers.products, "schedule_thumbnails", images.generate_thumbnails)
+    return tmp_path
+
+
+def _form(name: str):
+    return {"name": name, "description": "With an image", "price": "9.99", "stock": "3"}
+
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_valid_image_is_kept_with_its_thumbnails(client, admin, image_dir):
+    response = client.post("/api/products/", data=_form("Pictured"), headers=admin,
+                           files={"image": ("photo.png", _png(), "image/png")})
+    assert response.status_code == 201
+
+    product = response.json()
+    stem = product["image"].rsplit(".", 1)[0]
+    assert product["image"] in os.listdir(image_dir) and product["image_variants"]
+    for urls in product["image_variants"].values():
+        for url in urls.values():
+            assert url.rsplit("/", 1)[-1] in os.listdir(image_dir)
+            assert url.rsplit("/", 1)[-1].startswith(stem + "_")
+
+
+def test_non_image_is_rejected_and_removed(client, admin, image_dir):
+    response = client.post("/api/products/", data=_form("Fake"), headers=admin,
+                           files={"image": ("photo.png", b"not an image at all", "image/png")})
+    assert response.status_code == 400
+    assert os.listdir(image_dir) == []
+    assert client.get("/api/products/search?q=Fake").json() == []
+
+
+def test_oversize_upload_is_rejected_on_content_length(client, admin, image_dir, monkeypatch):
+    from core.config import settings
+
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 1024)
+    payload = b"\0" * (1024 + 128 * 1024)
+    response = client.post("/api/products/", data=_form("Huge"), headers=admin,
+                           files={"image": ("photo.png", payload, "image/png")})
+    assert response.status_code == 413
+    assert os.listdir(image_dir) == []
@@ -0,0 +1,159 @@
+import csv
+import json
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from models.product import Product
+from schemas.product import ProductCreate
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_rows(file: BinaryIO, format: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (row number, raw row) from a CSV or NDJSON upload without reading it all.
+
+    Lines are decoded one at a time, so a line that is not UTF-8 becomes a
+    row error. In a CSV it also ends the import, since the reader cannot
+    resynchronise; rows before it are kept.
+    """
+    lines = (line.decode("utf-8") for line in file)
+
+    if format == "csv":
+        # Row 1 is the header
+        row_number = 1
+        try:
+            for row in csv.DictReader(lines):
+                row_number += 1
+                yield row_number, row
+        except UnicodeDecodeError:
+            yield row_number + 1, ValueError("Not valid UTF-8; the rest of the file was not imported")
+        return
+
+    for row_number, line in enumerate(file, start=1):
+        try:
+            line = line.decode("utf-8")
+        except UnicodeDecodeError:
+            yield row_number, ValueError("Not valid UTF-8")
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def _describe(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}" if field else first["msg"]
+
+
+class ImportReport:
+    """Counts and per-row errors of a bulk import"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, row_number: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _apply_batch(db: Session, batch: List[Tuple[int, Any]], report: ImportReport) -> None:
+    """Upsert one batch by product name in a single transaction"""
+    rows: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+    for row_number, raw in batch:
+        if isinstance(raw, Exception):
+            report.error(row_number, str(raw))
+            continue
+        if not isinstance(raw, dict):
+            report.error(row_number, "Row must be an object")
+            continue
+        try:
+            product = ProductCreate.model_validate(raw)
+        except ValidationError as e:
+            report.error(row_number, _describe(e))
+            continue
+        # A later row with the same name wins. Fields missing from the row are left
+        # out, so an update keeps their current values instead of writing NULL
+        rows[product.name] = (row_number, product.model_dump(exclude_unset=True))
+
+    if not rows:
+        return
+
+    existing = dict(db.execute(
+        select(Product.name, Product.id).where(Product.name.in_(list(rows)))
+    ).all())
+    inserts = [data for name, (_, data) in rows.items() if name not in existing]
+    updates = [{"id": existing[name], **data} for name, (_, data) in rows.items() if name in existing]
+
+    try:
+        # Both run as executemany statements, not one INSERT/UPDATE per ORM object
+        if inserts:
+            db.execute(insert(Product), inserts)
+        if updates:
+            db.execute(update(Product), updates)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        # Find the rows the database refused by retrying the batch one row at a time
+        for name, (row_number, data) in rows.items():
+            _apply_row(db, row_number, data, existing.get(name), report)
+        return
+
+    report.inserted += len(inserts)
+    report.updated += len(updates)
+
+
+def _apply_row(db: Session, row_number: int, data: Dict[str, Any], product_id: Optional[int],
+               report: ImportReport) -> None:
+    """Upsert a single row in its own transaction, reporting it if the database refuses it"""
+    try:
+        if product_id is None:
+            db.execute(insert(Product), [data])
+        else:
+            db.execute(update(Product), [{"id": product_id, **data}])
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        report.error(row_number, f"Database error: {e.__class__.__name__}")
+        return
+
+    if product_id is None:
+        report.inserted += 1
+    else:
+        report.updated += 1
+
+
+def import_products(db: Session, file: BinaryIO, format: str, batch_size: int) -> Dict[str, Any]:
+    """Stream rows from `file` and upsert them by name, committing every `batch_size` rows"""
+    report = ImportReport()
+    batch: List[Tuple[int, Any]] = []
+
+    for row in iter_rows(file, format):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _apply_batch(db, batch, report)
+            batch = []
+
+    if batch:
+        _apply_batch(db, batch, report)
+
+    return report.as_dict()
@@ -0,0 +1,411 @@
+"""
+TTL caches with two interchangeable backends.
+
+`TTLCache` keeps entries in this process. `SQLiteCache` keeps them in a
+SQLite file, so every worker on the host sees the same entries, deletes and
+versions. `create_cache()` returns whichever CACHE_BACKEND selects.
+
+Both also hold a version token per namespace: caches that store entries
+under the current version are invalidated everywhere by `bump_version()`.
+
+SQLiteCache stores values as JSON (bytes allowed, tuples come back as lists),
+so reading a tampered cache file can never run code; callers cache plain
+data rather than objects. Its file is created 0600, in a private 0700
+directory unless CACHE_PATH names one.
+
+SQLiteCache calls block on file I/O and on other workers' write locks, so
+async code uses the awaitable methods (`aget`, `aset`, `aadd`, `adelete`,
+`aversion`): they run SQLite calls in the threadpool and memory calls inline.
+"""
+import base64
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+
+
+class AwaitableCache:
+    """Awaitable versions of the cache methods, for use on the event loop"""
+
+    # True for backends whose calls may block (disk, locks held by other processes)
+    blocking = False
+
+    async def _call(self, method, *args, **kwargs):
+        if self.blocking:
+            return await run_in_threadpool(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def aget(self, key: Hashable) -> Optional[Any]:
+        return await self._call(self.get, key)
+
+    async def aset(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        await self._call(self.set, key, value, ttl)
+
+    async def aadd(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        return await self._call(self.add, key, value, ttl)
+
+    async def adelete(self, key: Hashable) -> None:
+        await self._call(self.delete, key)
+
+    async def aversion(self) -> str:
+        return await self._call(self.version)
+
+
+class TTLCache(AwaitableCache):
+    """Thread-safe LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._version = secrets.token_hex(8)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; `ttl` can only shorten the cache-wide TTL"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        """
+        Store a value only if the key is missing or expired; True when stored.
+        Always True when caching is disabled, so claims made with it never block.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return True
+
+        # Checked and stored under one lock, so two threads cannot both claim a key
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        # Caller holds the lock
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        # Evict least recently used entries
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def version(self) -> str:
+        return self._version
+
+    def bump_version(self) -> str:
+        """Start a new version; entries stored under the old one are never looked up again"""
+        with self._lock:
+            self._version = secrets.token_hex(8)
+            return self._version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+SQLITE_CACHE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value BLOB NOT NULL,
+        expires_at REAL NOT NULL,
+        stored_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_cache_entries_stored ON cache_entries (namespace, stored_at)",
+    """
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        namespace TEXT PRIMARY KEY,
+        version TEXT NOT NULL
+    )
+    """,
+]
+
+# Sets between two eviction sweeps of a namespace
+EVICTION_INTERVAL = 64
+
+BYTES_TAG = "__bytes__"
+
+
+def _encode(value: Any) -> str:
+    def default(item):
+        if isinstance(item, (bytes, bytearray)):
+            return {BYTES_TAG: base64.b64encode(item).decode("ascii")}
+        raise TypeError(f"{type(item).__name__} cannot be stored in the cache")
+
+    return json.dumps(value, default=default, separators=(",", ":"))
+
+
+def _decode(text: str) -> Any:
+    def object_hook(item):
+        if len(item) == 1 and BYTES_TAG in item:
+            return base64.b64decode(item[BYTES_TAG])
+        return item
+
+    return json.loads(text, object_hook=object_hook)
+
+
+def _check_private(path: str, st: os.stat_result) -> None:
+    """Refuse cache files and directories that another user owns or can get at"""
+    if st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077:
+        raise PermissionError(
+            f"Cache path '{path}' must be owned by this user and not accessible to group or others"
+        )
+
+
+def _open_private_file(path: str) -> None:
+    """Create the cache file with mode 0600, or check an existing one"""
+    # O_NOFOLLOW: a symlink planted at the path is refused, not followed
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        _check_private(path, os.fstat(fd))
+    finally:
+        os.close(fd)
+
+
+class SQLiteCache(AwaitableCache):
+    """
+    TTLCache with the same interface, stored in a SQLite file.
+
+    Values are stored as JSON, so they must be built from JSON types and
+    bytes; tuples come back as lists. Keys are stored by repr(), so they must
+    be built from plain values (str, int, float, None, tuples of those). Expiry uses wall
+    clock time because it is compared across processes. Eviction drops the
+    least recently stored entries of the namespace, in a sweep every
+    EVICTION_INTERVAL sets rather than on every write.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, namespace: str, maxsize: int, ttl: float):
+        self.path = path
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._sets = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        _open_private_file(path)
+        connection = self._connection()
+        with connection:
+            for statement in SQLITE_CACHE_DDL:
+                connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, repr(key))
+        ).fetchone()
+        if row is not None and row[1] > time.time():
+            try:
+                value = _decode(row[0])
+            except ValueError:
+                # Left by an older version that stored another format
+                value = None
+            if value is not None:
+                self._count(True)
+                return value
+        self._count(False)
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, repr(key), _encode(value), now + ttl, now)
+        )
+
+        with self._lock:
+            self._sets += 1
+            sweep = self._sets % EVICTION_INTERVAL == 0
+        if sweep:
+            self._evict(now)
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return True
+
+        now = time.time()
+        # Atomic across processes: an unexpired row wins
+        cursor = self._connection().execute(
+            """
+            INSERT INTO cache_entries (namespace, key, value, expires_at, stored_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (namespace, key) DO UPDATE SET
+                value = excluded.value, expires_at = excluded.expires_at, stored_at = excluded.stored_at
+            WHERE cache_entries.expires_at <= excluded.stored_at
+            """,
+            (self.namespace, repr(key), _encode(value), now + ttl, now)
+        )
+        return cursor.rowcount > 0
+
+    def _evict(self, now: float) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+            )
+            connection.execute(
+                """
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.maxsize)
+            )
+
+    def delete(self, key: Hashable) -> None:
+        self._connection().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, repr(key))
+        )
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def version(self) -> str:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT version FROM cache_versions WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        # First use of the namespace; a concurrent first use may win the insert
+        connection.execute(
+            "INSERT OR IGNORE INTO cache_versions (namespace, version) VALUES (?, ?)",
+            (self.namespace, secrets.token_hex(8))
+        )
+        return self.version()
+
+    def bump_version(self) -> str:
+        version = secrets.token_hex(8)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_versions (namespace, version) VALUES (?, ?)",
+            (self.namespace, version)
+        )
+        return version
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._connection().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?",
+            (self.namespace, time.time())
+        ).fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "size": size,
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                # Counted by this process only
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+def default_cache_path() -> str:
+    """
+    A cache file per database, so two deployments on one host never share
+    entries, in a 0700 directory of this user under the temp directory.
+    """
+    directory = os.path.join(tempfile.gettempdir(), f"mini-ecommerce-{os.getuid()}")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    # lstat: a symlink or someone else's directory at the predictable name is refused
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"Cache directory '{directory}' is not a directory")
+    _check_private(directory, st)
+
+    digest = hashlib.sha1(settings.DATABASE_URL.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(directory, f"cache-{digest}.db")
+
+
+def create_cache(namespace: str, maxsize: int, ttl: float):
+    """
+    A TTLCache or SQLiteCache for `namespace`, depending on CACHE_BACKEND.
+    Cache only JSON-storable values so either backend can hold them.
+    """
+    if settings.CACHE_BACKEND == "memory":
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCache(settings.CACHE_PATH or default_cache_path(), namespace, maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"Unknown CACHE_BACKEND '{settings.CACHE_BACKEND}', use 'memory' or 'sqlite'")
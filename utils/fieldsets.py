@@ -0,0 +1,165 @@
+"""
+Sparse fieldsets: `?fields=items.quantity,items.product.name`.
+
+A selection is parsed against a response schema into a tree of field names,
+turned into load_only/selectinload options so unselected columns are never
+read, and finally used to project the loaded rows into plain dicts.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type, Union, get_args, get_origin
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+# Field name -> nested selection, or None for a scalar field
+Selection = Dict[str, Optional["Selection"]]
+
+MAX_FIELDS_LENGTH = 2000
+
+
+def _computed_fields(model: Type[BaseModel]) -> Dict[str, Callable[[Any], Any]]:
+    """Computed field getters of a schema, callable on the ORM object itself"""
+    return {
+        name: decorator.info.wrapped_property.fget
+        for name, decorator in model.__pydantic_decorators__.computed_fields.items()
+    }
+
+
+def _field_names(model: Type[BaseModel]) -> List[str]:
+    """Fields in the order the schema serializes them"""
+    return [*model.model_fields, *_computed_fields(model)]
+
+
+def _nested_model(model: Type[BaseModel], name: str) -> Optional[Type[BaseModel]]:
+    """The schema of a nested (or list of nested) field, None for scalars"""
+    field = model.model_fields.get(name)
+    if field is None:
+        return None
+
+    annotation = field.annotation
+    while get_origin(annotation) in (list, List, Union):
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def full_selection(model: Type[BaseModel]) -> Selection:
+    selection = {}
+    for name in _field_names(model):
+        nested = _nested_model(model, name)
+        selection[name] = full_selection(nested) if nested else None
+    return selection
+
+
+def parse_fields(fields: str, model: Type[BaseModel]) -> Selection:
+    """Parse a comma-separated list of dotted paths; naming a nested object selects all of it"""
+    selection: Selection = {}
+
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+
+        node, current = selection, model
+        parts = path.split(".")
+        for index, part in enumerate(parts):
+            if part not in _field_names(current):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown field '{path}'"
+                )
+
+            nested = _nested_model(current, part)
+            last = index == len(parts) - 1
+            if nested is None:
+                if not last:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Unknown field '{path}'"
+                    )
+                node[part] = None
+            elif last:
+                node[part] = full_selection(nested)
+            else:
+                node = node.setdefault(part, {})
+                current = nested
+
+    if not selection:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields selected"
+        )
+    return selection
+
+
+def fieldset(model: Type[BaseModel]):
+    """Dependency parsing `?fields=` for responses of `model` (None when absent)"""
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            max_length=MAX_FIELDS_LENGTH,
+            description="Comma-separated fields to return, e.g. items.quantity,items.product.name"
+        )
+    ) -> Optional[Selection]:
+        return parse_fields(fields, model) if fields else None
+
+    return dependency
+
+
+def load_options(selection: Selection, model: Type[BaseModel], entity, required: Iterable[str] = ()) -> list:
+    """
+    Loader options that read only the selected columns of `entity`.
+
+    Primary keys, foreign keys behind selected relationships, the columns a
+    selected computed field reads (the schema's COMPUTED_FIELD_SOURCES) and
+    `required` are always loaded.
+    """
+    mapper = inspect(entity)
+    computed = _computed_fields(model)
+    sources = getattr(model, "COMPUTED_FIELD_SOURCES", {})
+
+    columns = {mapper.get_property_by_column(column).key for column in mapper.primary_key}
+    columns.update(required)
+    options = []
+
+    for name, subtree in selection.items():
+        if name in mapper.relationships:
+            relationship = mapper.relationships[name]
+            if relationship.direction is MANYTOONE:
+                columns.update(mapper.get_property_by_column(column).key for column in relationship.local_columns)
+            options.append(
+                selectinload(getattr(entity, name)).options(
+                    *load_options(subtree or {}, _nested_model(model, name), relationship.mapper.class_)
+                )
+            )
+        elif name in computed:
+            columns.update(sources.get(name, ()))
+        else:
+            columns.add(name)
+
+    return [load_only(*(getattr(entity, column) for column in sorted(columns))), *options]
+
+
+def project(obj: Any, selection: Selection, model: Type[BaseModel]) -> Dict[str, Any]:
+    """Dict of the selected fields of a loaded row, shaped like `model`"""
+    computed = _computed_fields(model)
+    data = {}
+
+    for name in _field_names(model):
+        if name not in selection:
+            continue
+
+        value = computed[name](obj) if name in computed else getattr(obj, name)
+        subtree = selection[name]
+        if subtree is not None and value is not None:
+            nested = _nested_model(model, name)
+            if isinstance(value, (list, tuple)):
+                value = [project(item, subtree, nested) for item in value]
+            else:
+                value = project(value, subtree, nested)
+        data[name] = value
+
+    return data
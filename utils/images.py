@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Pattern, Tuple
+from fastapi import HTTPException, UploadFile, status
+from starlette.datastructures import Headers
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATH = "./app/static/products/"
+IMAGE_URL = "http://localhost:8000/static/products/"
+ALLOWED_EXTENSIONS = ["png", "jpg", "jpeg"]
+CHUNK_SIZE = 1024 * 1024  # 1MB
+# Room for the other form fields and multipart boundaries next to the image
+FORM_OVERHEAD = 64 * 1024
+
+# Thumbnails are generated here, after the request that uploaded the image returned
+thumbnail_executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix="thumbnails"
+)
+
+
+def thumbnail_sizes() -> List[int]:
+    """Configured thumbnail edge lengths in pixels"""
+    return [int(size) for size in settings.THUMBNAIL_SIZES.split(",") if size.strip()]
+
+
+def variant_name(image_name: str, size: int, extension: str) -> str:
+    """File name of a thumbnail variant, e.g. abc_300.webp"""
+    stem = image_name.rsplit(".", 1)[0]
+    return f"{stem}_{size}.{extension}"
+
+
+def save_upload(image: UploadFile) -> str:
+    """Stream an uploaded image to disk in chunks, enforcing MAX_FILE_SIZE"""
+    os.makedirs(IMAGE_PATH, exist_ok=True)
+
+    extension = image.filename.split(".")[-1].lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image format not supported"
+        )
+
+    image_name = secrets.token_hex(10) + "." + extension
+    image_path = os.path.join(IMAGE_PATH, image_name)
+
+    written = 0
+    try:
+        with open(image_path, "wb") as f:
+            while chunk := image.file.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > settings.MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Image is larger than {settings.MAX_FILE_SIZE} bytes"
+                    )
+                f.write(chunk)
+        verify_image(image_path)
+    except BaseException:
+        # Never leave a partial upload behind; open() itself may have failed
+        if os.path.exists(image_path):
+            os.remove(image_path)
+        raise
+
+    return image_name
+
+
+def verify_image(image_path: str) -> None:
+    """Reject files that Pillow cannot parse, so no product points at a broken image"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(image_path) as img:
+            img.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File is not a valid image"
+        )
+
+
+class UploadLimitMiddleware:
+    """
+    Plain ASGI middleware answering 413 for uploads whose Content-Length is
+    already over MAX_FILE_SIZE, before the multipart body is read and spooled.
+
+    Requests without a Content-Length (chunked) still pass through and are
+    cut off by `save_upload` as they stream in.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Iterable[Tuple[str, str]]):
+        self.app = app
+        self.routes: List[Tuple[str, Pattern]] = [(method, compile_path(path)[0]) for method, path in routes]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and any(
+            scope["method"] == method and pattern.match(scope["path"]) for method, pattern in self.routes
+        ):
+            content_length = Headers(scope=scope).get("content-length", "")
+            if content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE + FORM_OVERHEAD:
+                body = json.dumps({"detail": f"Image is larger than {settings.MAX_FILE_SIZE} bytes"}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        await self.app(scope, receive, send)
+
+
+def generate_thumbnails(image_name: str) -> None:
+    """Write WebP and original-format variants for every size, then shrink the original to 300x300"""
+    # Imported here so only the worker threads pay for loading Pillow
+    from PIL import Image
+
+    image_path = os.path.join(IMAGE_PATH, image_name)
+    extension = image_name.rsplit(".", 1)[-1]
+
+    try:
+        with Image.open(image_path) as img:
+            img.load()
+
+            for size in thumbnail_sizes():
+                thumbnail = img.copy()
+                thumbnail.thumbnail((size, size))
+                thumbnail.save(os.path.join(IMAGE_PATH, variant_name(image_name, size, extension)))
+                thumbnail.save(os.path.join(IMAGE_PATH, variant_name(image_name, size, "webp")), "WEBP")
+
+            # Resize to 300x300 pixels, swapped in atomically since it may already be served
+            resized = img.resize((300, 300))
+            temporary_path = image_path + ".tmp"
+            resized.save(temporary_path, format=img.format)
+            os.replace(temporary_path, image_path)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", image_name)
+
+
+def schedule_thumbnails(image_name: str) -> None:
+    """Queue thumbnail generation without blocking the caller"""
+    thumbnail_executor.submit(generate_thumbnails, image_name)
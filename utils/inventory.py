@@ -0,0 +1,44 @@
+from typing import Dict, List, Tuple
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+from models.product import Product
+
+
+def reserve_stock(db: Session, quantities: Dict[int, int]) -> bool:
+    """
+    Decrement stock for several products in one conditional UPDATE.
+
+    A row is only updated while it still holds enough stock, so concurrent
+    checkouts can never drive stock below zero. Returns False when any product
+    was short or missing; the caller must then roll back, since the products
+    that did have enough stock were already decremented.
+    """
+    needed = case(quantities, value=Product.id)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock >= needed)
+        .values(stock=Product.stock - needed)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(quantities)
+
+
+def find_shortages(db: Session, quantities: Dict[int, int]) -> Tuple[List[int], List[Product]]:
+    """Return (missing product ids, products without enough stock) in one query"""
+    products = db.query(Product).filter(Product.id.in_(list(quantities))).all()
+    found = {product.id for product in products}
+
+    missing = [product_id for product_id in quantities if product_id not in found]
+    short = [product for product in products if product.stock < quantities[product.id]]
+    return missing, short
+
+
+def restore_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """Give stock back to several products in one UPDATE (deleted products are skipped)"""
+    returned = case(quantities, value=Product.id)
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)))
+        .values(stock=Product.stock + returned)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Build an opaque cursor from the last row of a page"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+
+    raw = json.dumps({"s": sort, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# Cursors whose sort value is a datetime (the orders cursor seeks on created_at)
+DATETIME_SORTS = {"created_at", "orders"}
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any, int]:
+    """
+    Decode a cursor into (sort key, last sort value, last id).
+
+    Cursors come back from clients, so every part is type checked: the sort
+    value is a datetime for DATETIME_SORTS and a string otherwise.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        sort, value, last_id = data["s"], data["v"], data["id"]
+    except (ValueError, KeyError, TypeError):
+        raise _invalid_cursor()
+
+    if not isinstance(sort, str) or not isinstance(value, str):
+        raise _invalid_cursor()
+    # bool is an int subclass, but never a row id
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise _invalid_cursor()
+
+    if sort in DATETIME_SORTS:
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            raise _invalid_cursor()
+    return sort, value, last_id
@@ -0,0 +1,138 @@
+"""
+Incremental sales rollups (daily_sales, product_daily_sales).
+
+Order routes call record_order() inside their own transaction, so a rollup
+row is never out of step with the orders it counts. `rebuild` recomputes
+both tables from the order history:
+
+    python -m utils.rollups rebuild
+"""
+import argparse
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models.analytics import DailySales, ProductDailySales
+from models.order import Order, OrderItem, OrderStatus
+
+# Dialects with INSERT .. ON CONFLICT
+UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _add(db: Session, model, keys: List[str], rows: List[Dict]) -> None:
+    """Add the non-key values of `rows` onto existing rows, inserting missing ones"""
+    if not rows:
+        return
+    table = model.__table__
+    counters = [column for column in rows[0] if column not in keys]
+
+    upsert = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(table).values(rows)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: table.c[column] + statement.excluded[column] for column in counters}
+        ))
+        return
+
+    # Other databases: update, then insert the rows that did not exist yet
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(*(table.c[key] == row[key] for key in keys))
+            .values({column: table.c[column] + row[column] for column in counters})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(row))
+
+
+def record_orders(db: Session, orders: Iterable[Order], sign: int) -> None:
+    """
+    Count orders into the rollups (sign=1) or take them back out (sign=-1).
+
+    Orders must be flushed so created_at is set. Runs on a sync session,
+    i.e. through AsyncSession.run_sync from the routes.
+    """
+    daily: Dict[date, Dict[str, float]] = defaultdict(lambda: {"orders": 0, "units": 0, "revenue": 0.0})
+    products: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+
+    for order in orders:
+        day = order.created_at.date()
+        daily[day]["orders"] += 1
+        daily[day]["revenue"] += order.total_amount
+        for item in order.items:
+            daily[day]["units"] += item.quantity
+            products[day, item.product_id]["units"] += item.quantity
+            products[day, item.product_id]["revenue"] += item.quantity * item.price
+
+    _add(db, DailySales, ["day"], [
+        {"day": day, **{column: sign * value for column, value in totals.items()}}
+        for day, totals in sorted(daily.items())
+    ])
+    _add(db, ProductDailySales, ["day", "product_id"], [
+        {"day": day, "product_id": product_id, **{column: sign * value for column, value in totals.items()}}
+        for (day, product_id), totals in sorted(products.items())
+    ])
+
+
+def record_order(db: Session, order: Order, sign: int) -> None:
+    """record_orders() for a single order"""
+    record_orders(db, [order], sign)
+
+
+def record_status_change(db: Session, order: Order, old_status: OrderStatus) -> None:
+    """Adjust the rollups when an order moves into or out of CANCELLED"""
+    was_counted = old_status != OrderStatus.CANCELLED
+    is_counted = order.status != OrderStatus.CANCELLED
+    if was_counted != is_counted:
+        record_order(db, order, 1 if is_counted else -1)
+
+
+def rebuild(db: Session) -> None:
+    """Recompute both rollup tables from orders and order items (caller commits)"""
+    day = func.date(Order.created_at)
+    counted = Order.status != OrderStatus.CANCELLED
+
+    order_units = (
+        select(OrderItem.order_id, func.sum(OrderItem.quantity).label("units"))
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+
+    db.execute(delete(DailySales))
+    db.execute(delete(ProductDailySales))
+
+    db.execute(insert(DailySales).from_select(
+        ["day", "orders", "units", "revenue"],
+        select(day, func.count(Order.id), func.coalesce(func.sum(order_units.c.units), 0), func.sum(Order.total_amount))
+        .outerjoin(order_units, order_units.c.order_id == Order.id)
+        .where(counted)
+        .group_by(day)
+    ))
+    db.execute(insert(ProductDailySales).from_select(
+        ["day", "product_id", "units", "revenue"],
+        select(day, OrderItem.product_id, func.sum(OrderItem.quantity), func.sum(OrderItem.quantity * OrderItem.price))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(counted)
+        .group_by(day, OrderItem.product_id)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the sales rollup tables")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    from core.database import SessionLocal
+
+    with SessionLocal() as db:
+        rebuild(db)
+        db.commit()
+        days = db.scalar(select(func.count()).select_from(DailySales))
+    print(f"Rebuilt sales rollups for {days} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,58 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import jwt
+from concurrent.futures import ThreadPoolExecutor
+from jose import JWTError, jwt
+import asyncio
 import bcrypt
+import time
 from core.config import settings
+from core.metrics import password_hash_duration
+
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the
+# event loop and out of the threadpool that sync routes are served from
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'),
-        hashed_password.encode('utf-8')
-    )
+    started = time.perf_counter()
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode('utf-8'),
+            hashed_password.encode('utf-8')
+        )
+    finally:
+        password_hash_duration.labels("verify").observe(time.perf_counter() - started)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     # Generate salt and hash password
-    salt = bcrypt.gensalt()
+    started = time.perf_counter()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    password_hash_duration.labels("hash").observe(time.perf_counter() - started)
     return hashed.decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_hash_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -33,4 +65,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    """Subject of a valid `Authorization: Bearer` token, None for anything else"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
@@ -0,0 +1,107 @@
+"""
+Fast JSON for the list endpoints.
+
+ProductResponse / OrderResponse validate every row and rebuild the image
+URLs per product before encoding. The functions here turn ORM rows straight
+into dicts with the same keys, order and values, and encode them with orjson
+when it is installed, falling back to pydantic's own encoder otherwise.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from pydantic_core import to_json
+from utils.images import IMAGE_URL, thumbnail_sizes, variant_name
+
+try:
+    import orjson
+except ImportError:  # optional, pydantic's encoder produces the same bytes
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Encode plain dicts/lists (datetimes and enums allowed) to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return to_json(value)
+
+
+class ProductSerializer:
+    """Builds ProductResponse-shaped dicts, computing the image URL parts once"""
+
+    def __init__(self):
+        self.sizes = [str(size) for size in thumbnail_sizes()]
+        self._variants: Dict[str, Optional[Dict[str, Dict[str, str]]]] = {}
+
+    def image_variants(self, image: Optional[str]):
+        if not image:
+            return None
+        variants = self._variants.get(image)
+        if variants is None:
+            extension = image.rsplit(".", 1)[-1]
+            variants = self._variants[image] = {
+                size: {fmt: f"{IMAGE_URL}{variant_name(image, int(size), fmt)}" for fmt in (extension, "webp")}
+                for size in self.sizes
+            }
+        return variants
+
+    def __call__(self, product) -> Dict[str, Any]:
+        image = product.image
+        return {
+            "id": product.id,
+            "name": product.name,
+            "description": product.description,
+            "price": float(product.price),
+            "stock": product.stock,
+            "image": image,
+            "created_at": product.created_at,
+            "updated_at": product.updated_at,
+            "image_url": f"{IMAGE_URL}{image}" if image else None,
+            "image_variants": self.image_variants(image),
+        }
+
+
+def product_dicts(products: Iterable) -> List[Dict[str, Any]]:
+    serialize = ProductSerializer()
+    return [serialize(product) for product in products]
+
+
+def order_dicts(orders: Iterable) -> List[Dict[str, Any]]:
+    """OrderResponse-shaped dicts; items and their products must already be loaded"""
+    serialize_product = ProductSerializer()
+    products: Dict[int, Dict[str, Any]] = {}
+
+    def product_dict(product):
+        # The same product shows up in many orders, build its dict once
+        cached = products.get(product.id)
+        if cached is None:
+            cached = products[product.id] = serialize_product(product)
+        return cached
+
+    return [
+        {
+            "id": order.id,
+            "user_id": order.user_id,
+            "total_amount": float(order.total_amount),
+            "status": order.status.value,
+            "items": [
+                {
+                    "id": item.id,
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "price": float(item.price),
+                    "product": product_dict(item.product),
+                    "created_at": item.created_at,
+                }
+                for item in order.items
+            ],
+            "created_at": order.created_at,
+            "updated_at": order.updated_at,
+        }
+        for order in orders
+    ]
+
+
+def dump_products(products: Iterable) -> bytes:
+    return dumps(product_dicts(products))
+
+
+def dump_orders(orders: Iterable) -> bytes:
+    return dumps(order_dicts(orders))